@@ -3,20 +3,25 @@ import os
 
 import numpy as np
 import pickle
-from gym import make
-from gym.spaces import Discrete, Box
+from typing import TYPE_CHECKING
 
 from utils.bucketing import MultiBucketer
 from utils.datastructures import ObservationDict
-from utils.path import get_run_path
+from utils.path import get_run_path, write_atomic
+from utils.visitation import VisitationStats
+
+if TYPE_CHECKING:
+    from gym.spaces import Discrete, Box
 
 class CartPoleAgent:
     """A Q-Learning agent for the cart-pole problem.
     
     The observation space for the cart pole problem is continuous so the agent buckets (discretises) the observation data.
+    Values that are ignored by the input mask are dropped before bucketing, so they do not add to the size of the state space.
     """
-    def __init__(self, action_space: Discrete, observation_space: Box, n_buckets: int=100, learning_rate=0.1, learning_rate_annealing=None,
-        discount_factor=0.99, exploration_rate=1.0, exploration_rate_annealing=None, initial_q_value = 0, input_mask=None):
+    def __init__(self, action_space: 'Discrete', observation_space: 'Box', n_buckets: int=100, learning_rate=0.1, learning_rate_annealing=None,
+        discount_factor=0.99, exploration_rate=1.0, exploration_rate_annealing=None, initial_q_value = 0, input_mask=None,
+        q_dtype=np.float64, count_dtype=np.float64):
         """Setup the agent.
 
         Arguments:
@@ -30,21 +35,76 @@ class CartPoleAgent:
             exploration_rate_annealing: an Annealer object that decays the exploration rate over time.
             initial_q_value: the value the Q-values should be initialised to.
             input_mask: a binary mask as a list of integers, with 0 indicating the value should be ignored and 1 indicating the value should be left untouched.
+            q_dtype: the type the Q-values are stored as, e.g. np.float32 or np.float16 to save memory.
+            count_dtype: the type the action counts are stored as, e.g. np.uint32 or np.uint16 to save memory. Integer
+                         counts saturate at the largest value of the type rather than overflowing.
         """
-        self.bucketer = MultiBucketer(observation_space.low, observation_space.high, n_buckets)
+        low, high = np.asarray(observation_space.low), np.asarray(observation_space.high)
+
+        assert input_mask is None or len(input_mask) == len(low)  # ensure input mask is same dimensions as observation (state) space.
+        self.input_mask = np.asarray(input_mask) if input_mask else np.ones(len(low))
+        self.active_dims = np.flatnonzero(self.input_mask)
+
+        self.bucketer = MultiBucketer(low[self.active_dims], high[self.active_dims], n_buckets)
         self.actions = np.arange(0, action_space.n)
-        self.action_counts = ObservationDict(0, action_space.n)
-        self.q_table = ObservationDict(initial_q_value, action_space.n)
+        self.action_counts = ObservationDict(0, action_space.n, base=self.bucketer.key_base, n_dims=self.bucketer.n,
+                                             dtype=count_dtype)
+        self.q_table = ObservationDict(initial_q_value, action_space.n, base=self.bucketer.key_base, n_dims=self.bucketer.n,
+                                       dtype=q_dtype)
+        self.visitation = VisitationStats(self.bucketer.n, n_buckets, table=self.q_table)
         self.learning_rate = learning_rate
         self.learning_rate_annealing = learning_rate_annealing
         self.discount_factor = discount_factor
         self.exploration_rate = exploration_rate
         self.exploration_rate_annealing = exploration_rate_annealing
 
-        assert input_mask is None or len(input_mask) == self.bucketer.n  # ensure input mask is same dimensions as observation (state) space.
-        self.input_mask = input_mask if input_mask else np.ones(self.bucketer.n)
+        self.model_path = None  # allocated on the first save, so creating an agent does not create a run directory.
+
+        self._init_buffers()
+
+    def _init_buffers(self):
+        """Allocate the scratch buffers that are reused every step, so that choosing actions and updating Q-values does
+        not allocate any arrays."""
+        self._dims = self.active_dims.tolist()
+        self._buckets = [0] * self.bucketer.n
+        self._scores = np.zeros(len(self.actions))
+
+    def state_id(self, observation):
+        """Find the state id of an observation.
+
+        The observation is not modified: the values that are not masked are bucketed in place and the buckets are
+        written to a scratch buffer.
+
+        Arguments:
+            observation: a set of observation values from the environment.
+
+        Returns: the integer state id (see ObservationDict.encode()) of the bucketed observation.
+        """
+        self.bucketer.get_bucketed_into(observation, self._buckets, self._dims)
+
+        return self.q_table.encode(self._buckets)
+
+    def state_ids(self, observations):
+        """Find the state ids of many observations at once.
+
+        Arguments:
+            observations: a (n_observations, n_inputs) array of observations.
+
+        Returns: an int64 array with the state id of each observation.
+        """
+        buckets = self.bucketer.get_bucketed_array(np.asarray(observations)[:, self.active_dims])
+
+        return self.q_table.encode_array(buckets)
+
+    def bucket(self, observation):
+        """Drop the values that are ignored by the input mask from an observation and bucket the rest.
+
+        Arguments:
+            observation: a set of observation values from the environment.
 
-        self.model_path = get_run_path(prefix='data/')
+        Returns: the bucketed state (a list of integers) for the observation.
+        """
+        return self.bucketer.get_bucketed(np.asarray(observation)[self.active_dims])
 
     def get_action(self, observation, t=0):
         """Get the best action based on the current observation.
@@ -55,19 +115,35 @@ class CartPoleAgent:
 
         Returns: the optimal action (integer) based on the current q_table
         """
-        observation *= self.input_mask
-        bucketed = self.bucketer.get_bucketed(observation)
+        state = self.state_id(observation)
+        self.visitation.visit(state, buckets=self._buckets)
+
+        counts, row = self.action_counts.lookup(state)
 
         # UCB-1 first chooses any actions that have yet to be chosen at least once.
-        for action in self.actions:
-            if self.action_counts[bucketed][action] < 1:
-                self.action_counts[bucketed][action] = 1
+        for action in range(len(self.actions)):
+            if counts[row, action] < 1:
+                counts[row, action] = 1
 
                 return action
 
-        q_values = [self.q_table[bucketed][action] + self.bonus(bucketed, action, t) for action in self.actions]
-        action = np.argmax(q_values)
-        self.action_counts[bucketed][action] += 1
+        if self.exploration_rate_annealing:
+            C = self.exploration_rate_annealing(self.exploration_rate, t)
+        else:
+            C = self.exploration_rate
+
+        # Q-value + bonus (see bonus()) for every action, computed in place.
+        q, q_row = self.q_table.lookup(state)
+        scores = self._scores
+        np.divide(2 * np.log(np.sum(counts[row])), counts[row], out=scores)
+        np.sqrt(scores, out=scores)
+        np.multiply(100 * C, scores, out=scores)
+        np.add(q[q_row], scores, out=scores)
+
+        action = int(np.argmax(scores))
+
+        if counts[row, action] < self.action_counts.max_value:
+            counts[row, action] += 1
 
         return action
 
@@ -81,14 +157,11 @@ class CartPoleAgent:
             observation: the set of observation values for the next step.
             t: the timestep in the current episode.
         """
-        prev_observation *= self.input_mask
-        observation *= self.input_mask
-        prev_bucketed = self.bucketer(prev_observation)
-        bucketed = self.bucketer(observation)
+        q, prev_row, row = self.q_table.lookup(self.state_id(prev_observation), self.state_id(observation))
 
-        prev_Q = self.q_table[prev_bucketed][prev_action]
-        action = np.argmax(self.q_table[bucketed])
-        next_Q = self.q_table[bucketed][action]
+        # Computed in double precision whatever the type of the table.
+        prev_Q = float(q[prev_row, prev_action])
+        next_Q = float(q[row].max())
 
         if self.learning_rate_annealing:
             a = self.learning_rate_annealing(self.learning_rate, t)
@@ -96,7 +169,7 @@ class CartPoleAgent:
             a = self.learning_rate
         
         g = self.discount_factor
-        self.q_table[prev_bucketed][prev_action] = (1 - a) * prev_Q  + a * (reward + g * next_Q)
+        q[prev_row, prev_action] = (1 - a) * prev_Q  + a * (reward + g * next_Q)
 
     def bonus(self, observation, action, t):
         """Calculate the exploration bonus for the observation-action pair.
@@ -118,8 +191,9 @@ class CartPoleAgent:
 
         Returns: the exploration bonus (to the Q-value) for taking the given action and observation.
         """
-        N_st = self.observation_count(observation)
-        N_st_ai = self.action_counts[observation][action]
+        counts, row = self.action_counts.lookup(self.state_id(observation))
+        N_st = np.sum(counts[row])
+        N_st_ai = counts[row, action]
 
         if self.exploration_rate_annealing:
             C = self.exploration_rate_annealing(self.exploration_rate, t)
@@ -136,7 +210,9 @@ class CartPoleAgent:
 
         Returns: the sum of action_count(observation, action) for all actions.
         """
-        return np.sum([self.action_counts[observation][action] for action in self.actions])
+        counts, row = self.action_counts.lookup(self.state_id(observation))
+
+        return np.sum(counts[row])
 
     def save(self, filename='RoleyPoley.q'):
         """Save the agent's current state to file.
@@ -146,16 +222,70 @@ class CartPoleAgent:
 
         Returns: the path of to where the file was saved.
         """
+        if self.model_path is None:
+            self.model_path = get_run_path(prefix='data/')
+
         os.makedirs(self.model_path, exist_ok=True)
         path = self.model_path + filename
 
-        with open(path, 'wb') as f:
-            f.write(pickle.dumps(self))
+        # Written atomically, since other processes (e.g. an EvaluationWorker) may pick up the file as soon as it exists.
+        write_atomic(path, pickle.dumps(self))
 
         print('[{}] Saving model to: {}'.format(datetime.now(), path))
 
         return path
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        if 'active_dims' not in state:
+            self._drop_masked_dims()
+
+        if self.q_table.base != self.bucketer.key_base:
+            self.q_table = self.q_table.with_base(self.bucketer.key_base)
+            self.action_counts = self.action_counts.with_base(self.bucketer.key_base)
+
+        if '_scores' not in state:
+            # Models saved before the agent used state ids kept the visitation statistics by bucketed observation.
+            self.rebuild_visitation()
+            self._init_buffers()
+        elif self.visitation.table is None:
+            # Models saved before the visitation statistics decoded their state ids.
+            self.visitation.table = self.q_table
+
+    def rebuild_visitation(self):
+        """Rebuild the visitation statistics from the action counts.
+
+        Every visit to a state increments one of its action counts, so the number of visits to a state is the sum of its
+        action counts.
+        """
+        self.visitation = VisitationStats(self.bucketer.n, self.bucketer.n_buckets, table=self.q_table)
+
+        for key, counts in self.action_counts.items():
+            if np.sum(counts) > 0:
+                self.visitation.visit(self.action_counts.encode(key), int(np.sum(counts)), buckets=key)
+
+    def _drop_masked_dims(self):
+        """Convert a model saved before masked values were dropped before bucketing.
+
+        Such models bucketed the masked values (which were always zero), so their states have a key for every value of
+        the observation.
+        """
+        self.input_mask = np.asarray(self.input_mask)
+        self.active_dims = np.flatnonzero(self.input_mask)
+        bucketers = [self.bucketer.bucketers[dim] for dim in self.active_dims]
+        self.bucketer = MultiBucketer([b.lower_bound for b in bucketers], [b.upper_bound for b in bucketers], self.bucketer.n_buckets)
+
+        for name in ['q_table', 'action_counts']:
+            table = getattr(self, name)
+            projected = ObservationDict(table.init_value, table.n_actions, table.bucketer, base=self.bucketer.key_base,
+                                       n_dims=self.bucketer.n, dtype=table.values.dtype)
+
+            for key, values in table.items():
+                projected[[key[dim] for dim in self.active_dims]][:] = values
+
+            setattr(self, name, projected)
+
     @staticmethod
     def load(fullpath):
         """Load a saved model.
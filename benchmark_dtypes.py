@@ -0,0 +1,88 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+import gym
+import numpy as np
+
+from utils.annealing import Step, ExponentialDecay
+from utils.evaluation import evaluate
+from utils.policy import GreedyPolicy
+from utils.seeding import derive_seed, seed_everything
+from agent import CartPoleAgent
+
+DTYPES = [('float64', 'float64'), ('float32', 'uint32'), ('float32', 'uint16'), ('float16', 'uint16')]
+
+parser = argparse.ArgumentParser(description='Compare the memory used by, and the score of, agents trained with different storage types \
+for the Q-values and action counts.')
+parser.add_argument('--n-episodes', type=int, default=500, help='the number of episodes to train each agent for.')
+parser.add_argument('--n-seeds', type=int, default=3, help='the number of agents (seeds) to train for each pair of types.')
+parser.add_argument('--eval-episodes', type=int, default=50, help='the number of greedy episodes to evaluate each agent with.')
+parser.add_argument('--n-buckets', type=int, default=6, help='how many buckets to separate the observation space into. \
+Finer bucketing means more states, which makes the difference in memory larger.')
+parser.add_argument('--n-workers', type=int, help='the number of processes to train the agents with. Defaults to the number of CPUs.')
+
+def train(q_dtype, count_dtype, seed, n_episodes, eval_episodes, n_buckets):
+    """Train an agent the same way as main.py and evaluate its greedy policy.
+
+    Returns: the episode lengths during training, the greedy evaluation episode lengths, the number of bytes per state
+             of the Q-table and action counts, the number of states, and the training time (in seconds).
+    """
+    env = gym.make('CartPole-v0')
+    seed_everything(seed, env)
+
+    agent = CartPoleAgent(env.action_space, env.observation_space,
+                          n_buckets=n_buckets, learning_rate=1, learning_rate_annealing=ExponentialDecay(k=1e-3),
+                          exploration_rate=1, exploration_rate_annealing=Step(k=2e-2, step_after=100),
+                          discount_factor=0.9, input_mask=[0, 1, 1, 1], q_dtype=q_dtype, count_dtype=count_dtype)
+
+    timesteps = np.zeros(n_episodes, dtype=int)
+    start = time.time()
+
+    for i_episode in range(n_episodes):
+        observation = env.reset()
+        cumulative_reward = 0
+
+        for t in range(200):
+            action = agent.get_action(observation, i_episode)
+            prev_observation = observation
+
+            observation, reward, done, info = env.step(action)
+            cumulative_reward += reward
+            agent.update(prev_observation, action, cumulative_reward, observation, i_episode)
+
+            if done:
+                break
+
+        timesteps[i_episode] = t + 1
+
+    elapsed = time.time() - start
+
+    env.seed(derive_seed(seed, 'evaluation'))
+    scores = evaluate(GreedyPolicy.from_agent(agent), env, eval_episodes)
+    env.close()
+
+    bytes_per_state = agent.q_table.values[0].nbytes + agent.action_counts.values[0].nbytes
+
+    return timesteps, scores, bytes_per_state, len(agent.q_table), elapsed
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    jobs = [(q_dtype, count_dtype, seed) for q_dtype, count_dtype in DTYPES for seed in range(args.n_seeds)]
+
+    with ProcessPoolExecutor(args.n_workers) as executor:
+        futures = [executor.submit(train, q_dtype, count_dtype, seed, args.n_episodes, args.eval_episodes, args.n_buckets)
+                   for q_dtype, count_dtype, seed in jobs]
+        results = [future.result() for future in futures]
+
+    print('{:>8} {:>8} {:>12} {:>8} {:>16} {:>16} {:>10}'.format('Q', 'counts', 'bytes/state', 'states', 'last 100 episodes',
+                                                              'greedy score', 'time (s)'))
+
+    for i, (q_dtype, count_dtype) in enumerate(DTYPES):
+        runs = results[i * args.n_seeds:(i + 1) * args.n_seeds]
+        training = [np.mean(timesteps[-100:]) for timesteps, _, _, _, _ in runs]
+        scores = [np.mean(scores) for _, scores, _, _, _ in runs]
+
+        print('{:>8} {:>8} {:>12} {:>8.0f} {:>9.1f} ± {:<4.1f} {:>9.1f} ± {:<4.1f} {:>10.2f}'.format(
+            q_dtype, count_dtype, runs[0][2], np.mean([run[3] for run in runs]), np.mean(training), np.std(training),
+            np.mean(scores), np.std(scores), np.mean([run[4] for run in runs])))
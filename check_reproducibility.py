@@ -0,0 +1,47 @@
+import argparse
+import csv
+import glob
+import sys
+
+parser = argparse.ArgumentParser(description='Check that two seeded runs produced identical trajectories.')
+parser.add_argument('path_a', type=str, help='the directory that contains the log files of the first run.')
+parser.add_argument('path_b', type=str, help='the directory that contains the log files of the second run.')
+
+args = parser.parse_args()
+
+def get_hashes(path):
+    """Read the per-episode trajectory hashes of a run.
+
+    Arguments:
+        path: the directory that contains the log files of the run.
+
+    Returns: a list of the trajectory hashes ordered by episode.
+    """
+    if path[-1] != '/':
+        path += '/'
+
+    matching_files = list(glob.glob(path + '*trajectory_hash.log'))
+
+    if len(matching_files) == 0:
+        raise FileNotFoundError('No trajectory hash log in {}. Was the run started with --seed?'.format(path))
+
+    with open(matching_files[0]) as f:
+        rows = csv.reader(line for line in f if not line.startswith('['))  # ignore timestamps starting with '['
+        next(rows)  # skip the header
+
+        return [row[1].strip() for row in rows]
+
+hashes_a = get_hashes(args.path_a)
+hashes_b = get_hashes(args.path_b)
+
+for i_episode, (hash_a, hash_b) in enumerate(zip(hashes_a, hashes_b)):
+    if hash_a != hash_b:
+        print('Runs diverge at episode {}.'.format(i_episode))
+        sys.exit(1)
+
+if len(hashes_a) != len(hashes_b):
+    print('Runs are identical for the first {} episodes but have a different number of episodes ({} vs {}).'
+          .format(min(len(hashes_a), len(hashes_b)), len(hashes_a), len(hashes_b)))
+    sys.exit(1)
+
+print('Runs are identical ({} episodes).'.format(len(hashes_a)))
@@ -0,0 +1,19 @@
+import argparse
+import os
+
+from utils.checkpoint import load_checkpoint
+from utils.policy import GreedyPolicy
+
+parser = argparse.ArgumentParser(description='Compile a previously trained model into a compact greedy policy.')
+parser.add_argument('path', type=str, help='the path of the model that is to be compiled.')
+parser.add_argument('--output', type=str, help='the path of the compiled policy. Defaults to the model path with the extension \'.npz\'.')
+
+args = parser.parse_args()
+# Delta checkpoints are already '.npz' files, so their whole suffix is replaced rather than overwriting them.
+root = args.path[:-len('.delta.npz')] if args.path.endswith('.delta.npz') else os.path.splitext(args.path)[0]
+output = args.output if args.output else root + '.npz'
+
+policy = GreedyPolicy.from_agent(load_checkpoint(args.path))
+policy.save(output)
+
+print('Saved policy with {} states ({} bytes) to: {}'.format(len(policy.actions), policy.actions.nbytes, output))
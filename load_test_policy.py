@@ -0,0 +1,59 @@
+import argparse
+import sys
+from threading import Thread
+import time
+
+import numpy as np
+
+from utils.policy_server import PolicyClient
+
+parser = argparse.ArgumentParser(description='Measure the latency of a policy server (see serve_policy.py).')
+parser.add_argument('--address', type=str, default='/tmp/cartpole-policy.sock',
+    help='the address of the server: either the path of a Unix socket or \'host:port\' for TCP.')
+parser.add_argument('--n-clients', type=int, default=8, help='the number of concurrent clients.')
+parser.add_argument('--n-requests', type=int, default=10000, help='the number of requests each client sends.')
+parser.add_argument('--seed', type=int, default=0, help='the seed used to generate the observations.')
+
+args = parser.parse_args()
+
+def run_client(observations, latencies, errors):
+    try:
+        client = PolicyClient(args.address, n_inputs=observations.shape[1])
+
+        for i, observation in enumerate(observations):
+            start = time.perf_counter()
+            client.get_action(observation)
+            latencies[i] = time.perf_counter() - start
+
+        client.close()
+    except Exception as error:
+        # Exceptions raised in a thread are not passed on to the main thread, so they are collected here.
+        errors.append(error)
+
+rng = np.random.RandomState(args.seed)
+observations = rng.normal(scale=[1.0, 1.0, 0.1, 1.0], size=(args.n_clients, args.n_requests, 4))
+latencies = np.zeros((args.n_clients, args.n_requests))
+errors = []
+threads = [Thread(target=run_client, args=(observations[i], latencies[i], errors)) for i in range(args.n_clients)]
+
+start = time.perf_counter()
+
+for thread in threads:
+    thread.start()
+
+for thread in threads:
+    thread.join()
+
+elapsed = time.perf_counter() - start
+
+if errors:
+    # The latencies of failed clients were never measured, so no results are reported.
+    for error in errors:
+        print('Client failed: {!r}'.format(error), file=sys.stderr)
+
+    sys.exit('{} of {} clients failed.'.format(len(errors), args.n_clients))
+
+p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+
+print('{} requests from {} clients in {:.2f}s ({:.0f} requests/s)'.format(latencies.size, args.n_clients, elapsed, latencies.size / elapsed))
+print('Latency p50: {:.1f}µs, p99: {:.1f}µs'.format(p50, p99))
@@ -1,18 +1,19 @@
 import argparse
-from io import StringIO
-import os
 from pathlib import Path
 import time
 
 import gym
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-        
+
 from utils.annealing import Step, TReciprocal, ExponentialDecay
-from utils.logger import Logger
+from utils.checkpoint import DeltaCheckpointer, load_checkpoint
+from utils.evaluation import EvaluationWorker, load_evaluation
+from utils.logger import Logger, make_step_log_policy
+from utils.merging import SyncDirectory
 from utils.path import get_run_path
-from utils.visualisation import Dashboard
+from utils.planning import DynaPlanner
+from utils.run_index import RunIndex
+from utils.seeding import derive_seed, seed_everything, TrajectoryHasher
+from utils.trajectory import TrajectoryRecorder
 from agent import CartPoleAgent
 
 parser = argparse.ArgumentParser(description='Train a Q-Learning agent on the CartPole problem.')
@@ -27,14 +28,48 @@ parser.add_argument('--log-verbosity', type=int, default=Logger.Verbosity.MINIMA
     help='the verbosity level of the logger.')
 parser.add_argument('--model-name', type=str, default='RoleyPoley', help='the name of the model. Used as the filename when saving the model.')
 parser.add_argument('--model-path', type=str, help='the path to a previous model. If this is set the designated model will be used for training.')
+parser.add_argument('--planning-steps', type=int, default=0, help='the number of simulated Q-value backups (Dyna-Q with \
+prioritized sweeping) to do after each real step. Set to 0 to disable planning.')
+parser.add_argument('--seed', type=int, help='the seed for the environment and random number generators. If this is set the run is reproducible \
+and a hash of each episode\'s trajectory is logged (see check_reproducibility.py).')
+parser.add_argument('--record-trajectories', action='store_true', help='flag to indicate the transitions should be recorded to \
+memory-mapped binary files (see utils/trajectory.py) instead of the observations, rewards and actions logs.')
+parser.add_argument('--sync-dir', type=str, help='the sync directory shared with other workers. If this is set the Q-table is merged \
+with the Q-tables of the other workers every --sync-rate episodes by a coordinator (see merge.py --sync-dir).')
+parser.add_argument('--worker-id', type=int, default=0, help='the id of this worker, unique among the workers that share the sync directory.')
+parser.add_argument('--sync-rate', type=int, default=100, help='how often the Q-table should be merged with the other workers (in episodes).')
+parser.add_argument('--eval-episodes', type=int, default=0, help='the number of greedy episodes to evaluate each checkpoint with. \
+The checkpoints are evaluated in a separate process while training, and the results are written to the evaluation log. Set to 0 to disable evaluation.')
+parser.add_argument('--q-dtype', type=str, default='float64', choices=['float64', 'float32', 'float16'],
+    help='the type the Q-values are stored as. Smaller types use less memory (see benchmark_dtypes.py).')
+parser.add_argument('--count-dtype', type=str, default='float64', choices=['float64', 'uint32', 'uint16'],
+    help='the type the action counts are stored as. Integer counts saturate rather than overflow.')
+parser.add_argument('--full-checkpoint-rate', type=int, default=1, help='how often a full checkpoint should be saved (in checkpoints). \
+The checkpoints in between only save the Q-table cells that changed since the previous checkpoint (see utils/checkpoint.py). \
+Set to 1 to only save full checkpoints.')
+parser.add_argument('--step-log-policy', type=str, nargs='+', default=['full'], help='how the observations, rewards and actions of \
+each step are logged: one of full, every-nth (every step of every --step-log-every-th episode), reservoir (a random sample of \
+--step-log-reservoir-size steps per log write), or aggregate (the sum, mean, min and max of each episode). Either a single policy for \
+all three logs, or a policy per log, e.g. observations=aggregate rewards=full actions=every-nth.')
+parser.add_argument('--step-log-every', type=int, default=10, help='how often the every-nth step log policy logs an episode (in episodes).')
+parser.add_argument('--step-log-reservoir-size', type=int, default=1000, help='the number of steps the reservoir step log policy keeps.')
 
 args = parser.parse_args()
 
 if args.no_plot:
     args.live_plot = False
 
-if not args.no_plot:
-    dashboard = Dashboard(ema_alpha=1e-2, real_time=args.live_plot)
+def make_dashboard():
+    # matplotlib and pandas are slow to import, so they are only loaded once a plot is actually needed.
+    from utils.visualisation import Dashboard
+
+    return Dashboard(ema_alpha=1e-2, real_time=args.live_plot)
+
+def get_evaluation():
+    return load_evaluation(logger.log_path, checkpoint_prefix) if args.eval_episodes > 0 else None
+
+if args.live_plot:
+    dashboard = make_dashboard()
 
 # Setup logger
 logger = Logger(verbosity=args.log_verbosity, filename_prefix=args.model_name)
@@ -42,21 +77,68 @@ logger.log('episode_info', 'episode,timesteps')
 logger.log('learning_rate', 'learning_rate')
 logger.log('exploration_rate', 'exploration_rate')
 
+if args.seed is not None:
+    logger.log('trajectory_hash', 'episode,hash')
+
+if not args.record_trajectories:
+    step_log_policies = dict(observations='full', rewards='full', actions='full')
+
+    for spec in args.step_log_policy:
+        series, _, policy = spec.rpartition('=')
+
+        for name in ([series] if series else step_log_policies):
+            if name not in step_log_policies:
+                parser.error('unknown step log: {}'.format(name))
+
+            step_log_policies[name] = policy
+
+    for name, policy in step_log_policies.items():
+        try:
+            logger.set_policy(name, make_step_log_policy(policy, args.step_log_every, args.step_log_reservoir_size,
+                                                         seed=derive_seed(args.seed, 'step_log', name)))
+        except ValueError as e:
+            parser.error(str(e))
+
 # Load OpenAI Gym and agent.
 env = gym.make('CartPole-v0')
 
+if args.seed is not None:
+    # Workers that share a sync directory get their own seeds, otherwise they would all run the same episodes.
+    seed_everything(derive_seed(args.seed, 'worker', args.worker_id) if args.sync_dir else args.seed, env)
+    hasher = TrajectoryHasher()
+
 model_filename = args.model_name + '.q'
-checkpoint_filename_format = args.model_name + '-checkpoint-{:03d}.q'
+checkpoint_prefix = args.model_name
+
+if args.eval_episodes > 0:
+    # Unseeded runs are still evaluated on the same episodes every checkpoint, so the checkpoints can be compared.
+    evaluation_seed = derive_seed(args.seed if args.seed is not None else 0, 'evaluation')
+    evaluation_worker = EvaluationWorker(logger.log_path, checkpoint_prefix, args.checkpoint_rate, args.eval_episodes, evaluation_seed)
+    evaluation_worker.start()
 
 if args.model_path:
-    agent = CartPoleAgent.load(args.model_path)
+    agent = load_checkpoint(args.model_path)
     args.model_name = Path(args.model_path).name
     agent.model_path = get_run_path(prefix='data/')
 else:
     agent = CartPoleAgent(env.action_space, env.observation_space, 
                             n_buckets=6, learning_rate=1, learning_rate_annealing=ExponentialDecay(k=1e-3), 
                             exploration_rate=1, exploration_rate_annealing=Step(k=2e-2, step_after=100),
-                            discount_factor=0.9, input_mask=[0, 1, 1, 1])
+                            discount_factor=0.9, input_mask=[0, 1, 1, 1], q_dtype=args.q_dtype, count_dtype=args.count_dtype)
+
+checkpointer = DeltaCheckpointer(agent, checkpoint_prefix, full_rate=args.full_checkpoint_rate)
+
+if args.record_trajectories:
+    recorder = TrajectoryRecorder(logger.log_path + args.model_name + '-trajectory/', n_inputs=env.observation_space.shape[0])
+
+if args.planning_steps > 0:
+    planner = DynaPlanner(agent, n_steps=args.planning_steps)
+
+if args.sync_dir:
+    sync_dir = SyncDirectory(args.sync_dir)
+
+run_index = RunIndex('data/')
+run_index.append(logger.log_path, RunIndex.Status.STARTED, config=vars(args), log_path=logger.log_path)
 
 start = time.time()
 
@@ -68,10 +150,7 @@ for i_episode in range(args.n_episodes):
     episode_start = time.time()
 
     # logging
-    episode = '[Episode {}]'.format(i_episode)       
-    logger.log('observations', episode)
-    logger.log('rewards', episode)
-    logger.log('actions', episode)
+    logger.start_episode(i_episode)
 
     if agent.learning_rate_annealing:
         logger.log('learning_rate', agent.learning_rate_annealing(agent.learning_rate, i_episode))
@@ -89,7 +168,11 @@ for i_episode in range(args.n_episodes):
 
         logger.print('Checkpoint #{}'.format(checkpoint))
         logger.print('Total elapsed time: {:02.4f}s'.format(time.time() - start))
-        agent.save(checkpoint_filename_format.format(checkpoint))
+        logger.print('Visited states: {} ({:.2%} coverage)'.format(len(agent.visitation), agent.visitation.coverage()))
+        checkpointer.save(checkpoint)
+
+        if args.record_trajectories:
+            recorder.flush()
         
         if not args.live_plot:
             logger.write(mode='a')
@@ -98,10 +181,10 @@ for i_episode in range(args.n_episodes):
             logger.write(mode='w')
 
     if args.live_plot and i_episode == 1:
-        dashboard.warmup(logger, agent.q_table)
+        dashboard.warmup(logger, agent.q_table, get_evaluation())
 
     if args.live_plot and (i_episode > 0 and i_episode % args.plot_update_rate == 0):
-        dashboard.draw(logger, agent.q_table)    
+        dashboard.draw(logger, agent.q_table, get_evaluation())    
 
     cumulative_reward = 0
 
@@ -117,9 +200,19 @@ for i_episode in range(args.n_episodes):
         logger.print('Reward for last observation: {}'.format(cumulative_reward), Logger.Verbosity.FULL)
         agent.update(prev_observation, prev_action, cumulative_reward, observation, i_episode)
 
-        logger.log('observations', observation)
-        logger.log('rewards', reward)
-        logger.log('actions', action)
+        if args.planning_steps > 0:
+            planner.observe(prev_observation, prev_action, cumulative_reward, observation)
+            planner.plan(i_episode)
+
+        if args.record_trajectories:
+            recorder.record(prev_observation, action, reward, observation, done)
+        else:
+            logger.log_step('observations', observation)
+            logger.log_step('rewards', reward)
+            logger.log_step('actions', action)
+
+        if args.seed is not None:
+            hasher.update(observation, action, reward)
 
         if args.render:
             env.render()
@@ -131,15 +224,47 @@ for i_episode in range(args.n_episodes):
 
             break
 
+    logger.end_episode()
+
+    if args.record_trajectories:
+        recorder.end_episode()
+
+    if args.sync_dir and (i_episode + 1) % args.sync_rate == 0:
+        sync_dir.sync(agent, (i_episode + 1) // args.sync_rate - 1, args.worker_id)
+        logger.print('Synced with the other workers: {} states'.format(len(agent.q_table)))
+
+        if args.planning_steps > 0:
+            # the planner's model refers to rows of the old Q-table.
+            planner = DynaPlanner(agent, n_steps=args.planning_steps)
+
+    if args.seed is not None:
+        logger.log('trajectory_hash', '{:02d}, {}'.format(i_episode, hasher.end_episode()))
+
 env.close()
+
+if args.record_trajectories:
+    recorder.close()
+
 logger.write(mode='w' if args.live_plot else 'a')
 agent.save(model_filename)
 
+if args.eval_episodes > 0:
+    evaluation_worker.stop()
+
+run_info = dict(elapsed=time.time() - start)
+
+if args.seed is not None:
+    logger.print('Trajectory hash: {}'.format(hasher.hexdigest()))
+    run_info['trajectory_hash'] = hasher.hexdigest()
+
+run_index.append(logger.log_path, RunIndex.Status.FINISHED, **run_info)
+
 if args.live_plot or not args.no_plot:
     if args.live_plot:
-        dashboard.draw(logger, agent.q_table)
+        dashboard.draw(logger, agent.q_table, get_evaluation())
     else:
-        dashboard.warmup(logger, agent.q_table)
+        dashboard = make_dashboard()
+        dashboard.warmup(logger, agent.q_table, get_evaluation())
 
     dashboard.keep_on_screen()
     dashboard.close()
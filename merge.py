@@ -0,0 +1,45 @@
+import argparse
+
+from utils.checkpoint import load_checkpoint
+from utils.merging import SyncDirectory, dump, merge_agents
+
+parser = argparse.ArgumentParser(description='Merge the Q-tables of independently trained models, weighted by their action counts.')
+parser.add_argument('paths', type=str, nargs='*', help='the paths of the models that are to be merged.')
+parser.add_argument('--output', type=str, default='merged.q', help='the path of the merged model.')
+parser.add_argument('--base', type=str, help='the path of the model the models were trained from, if any. Only the experience gained \
+since the base model is weighted.')
+parser.add_argument('--sync-dir', type=str, help='run as the coordinator of a group of main.py workers that use this sync directory \
+(see main.py --sync-dir), instead of merging the given models.')
+parser.add_argument('--n-workers', type=int, default=2, help='the number of workers to wait for each round.')
+parser.add_argument('--n-rounds', type=int, help='the number of rounds to coordinate. Defaults to running until interrupted.')
+parser.add_argument('--timeout', type=float, help='how long to wait for the workers each round (in seconds) before merging the \
+models that were submitted so far. Defaults to waiting for all of the workers.')
+
+args = parser.parse_args()
+
+if args.sync_dir is None:
+    if len(args.paths) == 0:
+        parser.error('either the paths of the models to merge or --sync-dir must be given.')
+
+    base = load_checkpoint(args.base) if args.base else None
+    merged = merge_agents([load_checkpoint(path) for path in args.paths], base=base)
+    dump(merged, args.output)
+
+    print('Merged {} models into {} states: {}'.format(len(args.paths), len(merged.q_table), args.output))
+else:
+    sync_dir = SyncDirectory(args.sync_dir)
+    base = load_checkpoint(args.base) if args.base else None
+    i_round = 0
+
+    try:
+        while args.n_rounds is None or i_round < args.n_rounds:
+            paths = sync_dir.wait_for_workers(i_round, args.n_workers, timeout=args.timeout)
+            base = merge_agents([load_checkpoint(path) for path in paths], base=base)
+            sync_dir.publish(base, i_round)
+
+            print('Round {:03d}: merged {} models into {} states ({:.2%} coverage)'.format(
+                i_round, len(paths), len(base.q_table), base.visitation.coverage()))
+
+            i_round += 1
+    except KeyboardInterrupt:
+        pass
@@ -2,19 +2,16 @@ import argparse
 import glob
 import os
 
-import pandas as pd
-
-from agent import CartPoleAgent
-from utils.visualisation import Dashboard
+from utils.aggregation import find_runs, load_runs, mean_confidence_interval
 
 parser = argparse.ArgumentParser(description='Plot data from the log files.')
-parser.add_argument('path', type=str, help='the directory that contains the log files.')
+parser.add_argument('path', type=str, help='the directory that contains the log files. With --aggregate, the directory that \
+contains the run directories (e.g. data/ or data/yyyy/mm/dd/).')
 parser.add_argument('--alpha', type=float, default=0.01, help='the α term of the exponential moving average, which is used in the plot for timesteps survived.')
-
-args = parser.parse_args()
-
-if not os.path.isdir(args.path):
-    raise FileNotFoundError
+parser.add_argument('--aggregate', action='store_true', help='flag to indicate the episode lengths of all runs under path \
+should be plotted as a mean with a confidence band.')
+parser.add_argument('--n-workers', type=int, help='the number of processes used to load runs with --aggregate. Defaults to the number of CPUs.')
+parser.add_argument('--z', type=float, default=1.96, help='the z-score of the confidence band used with --aggregate.')
 
 def get_df(path, name):
     if path[-1] != '/':
@@ -25,6 +22,9 @@ def get_df(path, name):
     if len(matching_files) == 0:
         return
 
+    # pandas and the agent are slow to import and --aggregate does not need them, so they are only loaded here.
+    import pandas as pd
+
     filename = matching_files[0]
     df = pd.read_csv(filename, comment='[')  # ignore timestamps starting with '['
 
@@ -39,15 +39,63 @@ def get_agent(path):
     if len(matching_files) == 0:
         return
 
-    filename = sorted(matching_files)[0]    
+    # Prefer the final model over the checkpoints, and otherwise use the latest checkpoint.
+    final_models = [filename for filename in matching_files if '-checkpoint-' not in filename]
+    filename = sorted(final_models)[0] if final_models else sorted(matching_files)[-1]
+
+    from agent import CartPoleAgent
+
     agent = CartPoleAgent.load(filename)
 
     return agent
 
-agent = get_agent(args.path)
-dfs = (get_df(args.path, name) for name in ['episode_info', 'learning_rate', 'exploration_rate'])
+def plot_run(path, alpha):
+    from utils.visualisation import Dashboard
+
+    agent = get_agent(path)
+    dfs = (get_df(path, name) for name in ['episode_info', 'learning_rate', 'exploration_rate'])
+
+    db = Dashboard(real_time=False, ema_alpha=alpha)
+    db.draw(dfs, agent.q_table, get_df(path, 'evaluation'))
+    db.keep_on_screen()
+
+def plot_aggregate(path, n_workers, z):
+    """Plot the mean and confidence band of the episode lengths of all runs under a directory.
+
+    Arguments:
+        path: the directory that contains the run directories.
+        n_workers: the number of processes used to load the runs.
+        z: the z-score of the confidence band.
+    """
+    import matplotlib.pyplot as plt
+
+    runs = load_runs(find_runs(path), n_workers)
+
+    if len(runs) == 0:
+        raise FileNotFoundError('No runs found in {}'.format(path))
+
+    mean, lower, upper = mean_confidence_interval(list(runs.values()), z)
+    episodes = range(len(mean))
+
+    plt.figure(figsize=(12, 6))
+    plt.plot(episodes, mean, label='mean of {} runs'.format(len(runs)))
+    plt.fill_between(episodes, lower, upper, alpha=0.3, label='confidence band ($z=%.2f$)' % z)
+    plt.title('episode_info')
+    plt.xlabel('episode')
+    plt.ylabel('timestep')
+    plt.xlim(0)
+    plt.ylim(0, 200)
+    plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == '__main__':
+    args = parser.parse_args()
 
-db = Dashboard(real_time=False, ema_alpha=args.alpha)
-db.draw(dfs, agent.q_table)
-db.keep_on_screen()
+    if not os.path.isdir(args.path):
+        raise FileNotFoundError
 
+    if args.aggregate:
+        plot_aggregate(args.path, args.n_workers, args.z)
+    else:
+        plot_run(args.path, args.alpha)
@@ -5,18 +5,23 @@ from time import time, sleep
 
 import gym
 
-from agent import CartPoleAgent
+from utils.checkpoint import load_checkpoint
+from utils.seeding import seed_everything
 
 parser = argparse.ArgumentParser(description='Load and watch a previously trained model.')
 parser.add_argument('path', type=str, help='the path of the model that is to be loaded.')
 parser.add_argument('--n-episodes', type=int, default=20, help='num of episodes to playback.')
 parser.add_argument('--fps', type=int, default=100, help='frame rate for rendering. Set to -1 to render as fast as possible.')
+parser.add_argument('--seed', type=int, help='the seed for the environment and random number generators.')
 
 args = parser.parse_args()
 frame_delay = 1.0 / args.fps
 
 env = gym.make('CartPole-v0')
-agent = CartPoleAgent.load(args.path)
+agent = load_checkpoint(args.path)
+
+if args.seed is not None:
+    seed_everything(args.seed, env)
 
 for i_episode in range(args.n_episodes):
     observation = env.reset() 
@@ -0,0 +1,16 @@
+import argparse
+
+from utils.policy import GreedyPolicy
+from utils.policy_server import PolicyServer
+
+parser = argparse.ArgumentParser(description='Serve the actions of a compiled policy (see export_policy.py) over a local socket.')
+parser.add_argument('path', type=str, help='the path of the compiled policy.')
+parser.add_argument('--address', type=str, default='/tmp/cartpole-policy.sock',
+    help='the address to listen on: either the path of a Unix socket or \'host:port\' for TCP.')
+parser.add_argument('--max-batch-size', type=int, default=1024, help='the maximum number of requests answered together.')
+
+args = parser.parse_args()
+
+server = PolicyServer(GreedyPolicy.load(args.path), args.address, max_batch_size=args.max_batch_size)
+print('Serving {} on {}'.format(args.path, args.address))
+server.run()
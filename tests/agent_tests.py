@@ -1,13 +1,41 @@
 import os
+import pickle
 import sys
+import tempfile
 import unittest
 sys.path.append(os.getcwd())
 
 from gym import make
+import numpy as np
 
 from agent import CartPoleAgent
+from utils.bucketing import Bucketer, MultiBucketer
+from utils.datastructures import ObservationDict
 
 
+def make_legacy(cls, **state):
+    """Make an object with the given attributes, without calling its constructor, like the pickled objects of older
+    versions of the code."""
+    instance = cls.__new__(cls)
+    instance.__dict__.update(state)
+
+    return instance
+
+def make_legacy_table(init_value, n_actions, cells):
+    """Make an ObservationDict in the format saved before the values were stored in an array: a nested dictionary
+    with a dictionary for every bucket of the key, and an array of values at each leaf."""
+    table = {}
+
+    for key, values in cells.items():
+        cell = table
+
+        for bucket in key[:-1]:
+            cell = cell.setdefault(bucket, {})
+
+        cell[key[-1]] = np.array(values, dtype=float)
+
+    return make_legacy(ObservationDict, table=table, init_value=init_value, n_actions=n_actions, bucketer=None)
+
 def test(test_fn):
     def wrapper(*args):
         self = args[0]
@@ -57,6 +85,115 @@ class TestAgent(unittest.TestCase):
         self.agent.update(prev_observation, prev_action, reward, observation)
         assert str(self.agent.q_table) != prev_q_table, 'Q table unchanged:\n{}\nVS\n{}'.format(self.agent.q_table, prev_q_table)
 
+    @test
+    def test_masked_values_are_dropped(self):
+        agent = CartPoleAgent(self.env.action_space, self.env.observation_space, input_mask=[0, 1, 1, 1])
+        observation = self.env.reset()
+        original = observation.copy()
+
+        agent.get_action(observation)
+        keys, _ = agent.action_counts.to_arrays()
+
+        assert keys.shape == (1, 3)
+        assert (observation == original).all(), 'observation was modified'
+
+    @test
+    def test_counts_saturate(self):
+        agent = CartPoleAgent(self.env.action_space, self.env.observation_space, input_mask=[0, 1, 1, 1],
+                              q_dtype='float32', count_dtype='uint16')
+        observation = self.env.reset()
+
+        for _ in range(3):
+            agent.get_action(observation)
+
+        agent.action_counts.values[:] = 65535
+        agent.get_action(observation)
+
+        assert agent.action_counts.values.max() == 65535
+        assert agent.q_table.values.dtype == 'float32'
+
+    @test
+    def test_visitation_uses_bucketed_states(self):
+        agent = CartPoleAgent(self.env.action_space, self.env.observation_space, n_buckets=6, input_mask=[0, 1, 1, 1])
+        self.env.seed(0)
+        observations = [self.env.reset()]
+
+        for _ in range(20):
+            observation, _, done, _ = self.env.step(agent.get_action(observations[-1]))
+            observations.append(observation)
+
+            if done:
+                break
+
+        visited = [tuple(agent.bucket(observation)) for observation in observations[:-1]]
+
+        for observation in observations[:-1]:
+            assert agent.visitation.count(agent.bucket(observation)) == visited.count(tuple(agent.bucket(observation)))
+
+        hot_states = agent.visitation.hot_states(3)
+        state, count = hot_states[0]
+
+        assert state in visited
+        assert count == max(visited.count(state) for state in visited)
+        assert sum(count for _, count in agent.visitation.hot_states(len(visited))) == len(visited)
+
+    @test
+    def test_bonus_matches_get_action(self):
+        agent = CartPoleAgent(self.env.action_space, self.env.observation_space, n_buckets=6, input_mask=[0, 1, 1, 1])
+        observation = self.env.reset()
+
+        # Choose every action once, so that the next action is chosen by the Q-values and bonuses.
+        for _ in agent.actions:
+            agent.get_action(observation)
+
+        agent.q_table[agent.bucket(observation)][:] = [1.0, 0.5]
+        agent.action_counts[agent.bucket(observation)][:] = [20, 3]
+        scores = [agent.q_table[agent.bucket(observation)][action] + agent.bonus(observation, action, 0)
+                  for action in agent.actions]
+
+        assert agent.observation_count(observation) == 23
+        assert agent.get_action(observation) == np.argmax(scores)
+
+    @test
+    def test_loads_legacy_models(self):
+        # Models from before masked values were dropped, state ids were used and visits were counted. The masked cart
+        # position was always zero, which is bucket 3 of 6.
+        q_values = {(3, 0, 5, 2): [0.5, 1.5], (3, -1, 6, 1): [-2.0, 0.25], (3, 6, 0, -1): [3.0, 0.0]}
+        action_counts = {(3, 0, 5, 2): [2, 3], (3, -1, 6, 1): [1, 0], (3, 6, 0, -1): [4, 4]}
+        low, high = self.env.observation_space.low, self.env.observation_space.high
+        bucketer = make_legacy(MultiBucketer, n=4, n_buckets=6,
+                               bucketers=[Bucketer(lower, upper, 6) for lower, upper in zip(low, high)])
+        legacy = make_legacy(CartPoleAgent, bucketer=bucketer, actions=np.arange(2),
+                             action_counts=make_legacy_table(0, 2, action_counts), q_table=make_legacy_table(0, 2, q_values),
+                             learning_rate=0.1, learning_rate_annealing=None, discount_factor=0.99, exploration_rate=1.0,
+                             exploration_rate_annealing=None, input_mask=[0, 1, 1, 1], model_path=None)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'legacy.q')
+
+            with open(path, 'wb') as f:
+                pickle.dump(legacy, f)
+
+            agent = CartPoleAgent.load(path)
+
+        assert len(agent.q_table) == len(agent.action_counts) == len(q_values)
+
+        for key in q_values:
+            state = key[1:]
+
+            assert agent.q_table[state].tolist() == q_values[key]
+            assert agent.action_counts[state].tolist() == action_counts[key]
+            assert agent.visitation.count(state) == sum(action_counts[key])
+
+        assert agent.visitation.hot_states(1) == [((6, 0, -1), 8)]
+
+        # The converted agent keeps learning.
+        observation = self.env.reset()
+        visits = agent.visitation.count(agent.bucket(observation))
+
+        assert self.env.action_space.contains(agent.get_action(observation))
+        assert agent.visitation.count(agent.bucket(observation)) == visits + 1
+
     @test
     def test_model_saving(self):
         observation = self.env.reset()        
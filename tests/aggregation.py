@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from utils.aggregation import find_runs, load_episode_lengths, load_runs, mean_confidence_interval
+from utils.run_index import RunIndex
+
+def write_log(run_path, timesteps):
+    os.makedirs(run_path, exist_ok=True)
+
+    with open(os.path.join(run_path, 'RoleyPoley-episode_info.log'), 'w') as f:
+        f.write('[2018-12-07 00:00:00]\nepisode,timesteps\n')
+        f.write('\n'.join('{:02d}, {:02d}'.format(i, t) for i, t in enumerate(timesteps)) + '\n')
+
+class TestAggregation(unittest.TestCase):
+    def test_loads_runs(self):
+        with tempfile.TemporaryDirectory() as root:
+            write_log(os.path.join(root, '2018/12/07/run/001'), [10, 20, 30])
+            write_log(os.path.join(root, '2018/12/07/run/002'), [30, 40])
+
+            runs = load_runs(find_runs(root), n_workers=2)
+
+            assert len(runs) == 2
+            assert runs[os.path.join(root, '2018/12/07/run/001')].tolist() == [10, 20, 30]
+
+    def test_finds_runs_that_predate_the_index(self):
+        with tempfile.TemporaryDirectory() as root:
+            legacy = [os.path.join(root, '2018/12/07/run/001'), os.path.join(root, '2018/12/07/run/002')]
+            indexed = os.path.join(root, '2018/12/08/run/001')
+
+            for run_path in legacy + [indexed]:
+                write_log(run_path, [10, 20])
+
+            index = RunIndex(root)
+            index.append(indexed, RunIndex.Status.FINISHED)
+
+            assert find_runs(root) == sorted(legacy + [indexed])
+            assert find_runs(root, status=RunIndex.Status.FINISHED) == [indexed]
+
+    def test_uses_the_index_of_the_data_directory(self):
+        with tempfile.TemporaryDirectory() as root:
+            indexed = os.path.join(root, '2018/12/08/run/001')
+            other_day = os.path.join(root, '2018/12/09/run/001')
+            os.makedirs(indexed)  # no logs yet, so it can only be found through the index.
+            write_log(other_day, [10])
+
+            RunIndex(root).append(indexed, RunIndex.Status.STARTED)
+            RunIndex(root).append(other_day, RunIndex.Status.FINISHED)
+
+            assert find_runs(os.path.join(root, '2018/12/08/')) == [indexed]
+            assert find_runs(os.path.join(root, '2018/')) == [indexed, other_day]
+
+    def test_skips_dates_after_the_index_was_started(self):
+        with tempfile.TemporaryDirectory() as root:
+            indexed = os.path.join(root, '2999/01/01/run/001')
+            write_log(indexed, [10])
+            # every run started after the index was created is in the index, so this directory is never searched.
+            write_log(os.path.join(root, '2999/01/01/run/002'), [10])
+
+            RunIndex(root).append(indexed, RunIndex.Status.FINISHED)
+
+            assert find_runs(root) == [indexed]
+            assert find_runs(os.path.join(root, '2999/01/')) == [indexed]
+
+    def test_cache_is_invalidated(self):
+        with tempfile.TemporaryDirectory() as run_path:
+            write_log(run_path, [10, 20])
+            assert load_episode_lengths(run_path).tolist() == [10, 20]
+            assert load_episode_lengths(run_path).tolist() == [10, 20]
+
+            write_log(run_path, [10, 20, 30])
+            os.utime(os.path.join(run_path, 'RoleyPoley-episode_info.log'), ns=(0, 1))
+            assert load_episode_lengths(run_path).tolist() == [10, 20, 30]
+
+    def test_mean_confidence_interval(self):
+        mean, lower, upper = mean_confidence_interval([np.array([10, 20, 30]), np.array([30, 40])])
+
+        assert mean.tolist() == [20, 30, 30]
+        assert lower[0] < 20 < upper[0]
+        assert lower[2] == upper[2] == 30
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from tests.fixtures import make_agent
+from utils.checkpoint import DeltaCheckpointer, load_checkpoint
+from utils.merging import merge_agents
+from utils.policy import GreedyPolicy
+
+class TestDeltaCheckpointer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+        self.agent = make_agent()
+        self.agent.model_path = self.tmp_dir.name + '/'
+        self.checkpointer = DeltaCheckpointer(self.agent, 'test', full_rate=3)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, filename):
+        return os.path.join(self.tmp_dir.name, filename)
+
+    def step(self, observation, next_observation):
+        action = self.agent.get_action(observation)
+        self.agent.update(observation, action, 1.0, next_observation)
+
+    def assert_same_agent(self, a, b):
+        assert np.array_equal(a.q_table.to_arrays()[1], b.q_table.to_arrays()[1])
+        assert np.array_equal(a.action_counts.to_arrays()[1], b.action_counts.to_arrays()[1])
+        assert a.visitation.counts == b.visitation.counts
+
+    def test_deltas_only_hold_changed_states(self):
+        self.step([0.05, 0.05], [0.15, 0.05])
+        self.checkpointer.save(0)
+        self.step([0.55, 0.55], [0.65, 0.55])
+        path = self.checkpointer.save(1)
+
+        assert path == self.path('test-checkpoint-001.delta.npz')
+
+        with np.load(path) as delta:
+            assert len(delta['action_counts_state_ids']) == 1
+            assert len(delta['q_table_state_ids']) == 2
+
+    def test_reconstructs_checkpoints(self):
+        self.checkpointer.save(0)
+        self.step([0.05, 0.05], [0.15, 0.05])
+        self.checkpointer.save(1)
+        self.step([0.15, 0.05], [0.25, 0.05])
+        self.step([0.05, 0.05], [0.15, 0.05])
+        self.checkpointer.save(2)
+
+        self.assert_same_agent(load_checkpoint(self.path('test-checkpoint-002.delta.npz')), self.agent)
+        assert self.checkpointer.save(3) == self.path('test-checkpoint-003.q')
+
+    def test_replaced_tables(self):
+        self.step([0.05, 0.05], [0.15, 0.05])
+        self.checkpointer.save(0)
+
+        # a sync with other workers replaces the tables, with the rows in a different order.
+        other = merge_agents([self.agent])
+        other.q_table[[5, 5]][:] = 1.0
+        self.agent.q_table, self.agent.action_counts = other.q_table, other.action_counts
+        self.agent.rebuild_visitation()
+        self.checkpointer.save(1)
+
+        self.assert_same_agent(load_checkpoint(self.path('test-checkpoint-001.delta.npz')), self.agent)
+
+    def test_export_policy_loads_delta_checkpoints(self):
+        self.checkpointer.save(0)
+        self.step([0.05, 0.05], [0.15, 0.05])
+        self.step([0.55, 0.55], [0.65, 0.55])
+        path = self.checkpointer.save(1)
+
+        subprocess.run([sys.executable, os.path.join(os.getcwd(), 'export_policy.py'), path], check=True,
+                       stdout=subprocess.DEVNULL)
+
+        policy = GreedyPolicy.load(self.path('test-checkpoint-001.npz'))
+        expected = GreedyPolicy.from_agent(self.agent)
+        observations = np.random.RandomState(0).uniform(0, 1, size=(100, 2))
+
+        assert os.path.isfile(path), 'the delta checkpoint was overwritten'
+        assert np.array_equal(policy(observations), expected(observations))
+
+if __name__ == '__main__':
+    unittest.main()
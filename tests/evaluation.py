@@ -0,0 +1,60 @@
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+sys.path.append(os.getcwd())
+
+from gym import make
+
+from agent import CartPoleAgent
+from utils.evaluation import EvaluationWorker, evaluate, load_evaluation
+
+class CountdownEnv:
+    """An environment whose episodes end after a fixed number of steps."""
+    def __init__(self, length):
+        self.length = length
+
+    def reset(self):
+        self.t = 0
+
+        return [0.0]
+
+    def step(self, action):
+        self.t += 1
+
+        return [0.0], 1.0, self.t == self.length, {}
+
+class TestEvaluation(unittest.TestCase):
+    def test_evaluate(self):
+        policy = SimpleNamespace(get_action=lambda observation: 0)
+
+        assert evaluate(policy, CountdownEnv(7), n_episodes=3).tolist() == [7, 7, 7]
+        assert evaluate(policy, CountdownEnv(500), n_episodes=1, max_timesteps=200).tolist() == [200]
+
+    def test_worker_evaluates_checkpoints(self):
+        env = make('CartPole-v0')
+        agent = CartPoleAgent(env.action_space, env.observation_space, n_buckets=6, input_mask=[0, 1, 1, 1])
+        env.close()
+
+        with tempfile.TemporaryDirectory() as run_path:
+            run_path += '/'
+
+            for checkpoint in range(2):
+                with open('{}RoleyPoley-checkpoint-{:03d}.q'.format(run_path, checkpoint), 'wb') as f:
+                    f.write(pickle.dumps(agent))
+
+            worker = EvaluationWorker(run_path, 'RoleyPoley', checkpoint_rate=50, n_episodes=3, seed=0, poll_interval=0.01)
+            worker.start()
+            worker.stop()
+
+            evaluation = load_evaluation(run_path, 'RoleyPoley')
+
+            assert evaluation['checkpoint'].tolist() == [0, 1]
+            assert evaluation['episode'].tolist() == [0, 50]
+            # both checkpoints are the same agent, evaluated on the same episodes.
+            assert evaluation['mean'][0] == evaluation['mean'][1]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from agent import CartPoleAgent
+
+def make_agent(low=(0.0, 0.0), high=(1.0, 1.0), n_buckets=10, **kwargs):
+    """Make an agent for a toy problem with two actions and two observation values.
+
+    Arguments:
+        low: the lower bounds of the observation values.
+        high: the upper bounds of the observation values.
+        n_buckets: the number of buckets of each observation value.
+        kwargs: the other arguments of CartPoleAgent, e.g. discount_factor.
+
+    Returns: the agent.
+    """
+    action_space = SimpleNamespace(n=2)
+    observation_space = SimpleNamespace(low=np.array(low), high=np.array(high))
+
+    return CartPoleAgent(action_space, observation_space, n_buckets=n_buckets, **kwargs)
+
+def make_random_agent(n_observations=50, seed=0):
+    """Make an agent for observations from -1 to 1 with random Q-values for the states of some random observations.
+
+    Arguments:
+        n_observations: the number of random observations whose states get Q-values.
+        seed: the seed of the observations and Q-values.
+
+    Returns: the agent.
+    """
+    agent = make_agent(low=(-1.0, -1.0), high=(1.0, 1.0), n_buckets=4)
+    rng = np.random.RandomState(seed)
+
+    for observation in rng.uniform(-1, 1, size=(n_observations, 2)):
+        agent.q_table[agent.bucketer(observation)][:] = rng.rand(2)
+
+    return agent
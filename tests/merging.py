@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+sys.path.append(os.getcwd())
+
+from tests.fixtures import make_agent
+from utils.merging import SyncDirectory, merge_agents
+
+def set_cell(agent, key, q_values, counts):
+    agent.q_table[key][:] = q_values
+    agent.action_counts[key][:] = counts
+
+class TestMerging(unittest.TestCase):
+    def test_weighted_by_counts(self):
+        a, b = make_agent(), make_agent()
+        set_cell(a, [0, 0], [1.0, 4.0], [3, 1])
+        set_cell(b, [0, 0], [5.0, 2.0], [1, 0])
+        set_cell(b, [1, 0], [7.0, 7.0], [2, 2])
+
+        merged = merge_agents([a, b])
+
+        assert merged.q_table[[0, 0]].tolist() == [2.0, 4.0]
+        assert merged.action_counts[[0, 0]].tolist() == [4, 1]
+        assert merged.q_table[[1, 0]].tolist() == [7.0, 7.0]
+        assert merged.visitation.count(merged.q_table.encode([1, 0])) == 4
+        # the agents are not modified.
+        assert a.q_table[[0, 0]].tolist() == [1.0, 4.0]
+
+    def test_weighted_by_counts_since_base(self):
+        base = make_agent()
+        set_cell(base, [0, 0], [1.0, 1.0], [10, 10])
+
+        a, b = merge_agents([base]), merge_agents([base])
+        set_cell(a, [0, 0], [2.0, 1.0], [12, 10])
+        set_cell(b, [0, 0], [5.0, 1.0], [11, 10])
+
+        merged = merge_agents([a, b], base=base)
+
+        assert merged.q_table[[0, 0]].tolist() == [3.0, 1.0]
+        assert merged.action_counts[[0, 0]].tolist() == [13, 10]
+
+    def test_incompatible_agents(self):
+        with self.assertRaises(ValueError):
+            merge_agents([make_agent(n_buckets=10), make_agent(n_buckets=5)])
+
+    def test_sync_directory(self):
+        with tempfile.TemporaryDirectory() as path:
+            sync_dir = SyncDirectory(path, poll_interval=0.01)
+            agent = make_agent()
+            set_cell(agent, [0, 0], [1.0, 2.0], [1, 1])
+
+            sync_dir.submit(agent, 0, worker_id=0)
+            paths = sync_dir.wait_for_workers(0, n_workers=1)
+            assert len(paths) == 1
+            assert sync_dir.load_merged(0) is None
+
+            merged = make_agent()
+            set_cell(merged, [0, 0], [3.0, 4.0], [2, 2])
+            sync_dir.publish(merged, 0)
+            sync_dir.sync(agent, 0, worker_id=0)
+
+            assert agent.q_table[[0, 0]].tolist() == [3.0, 4.0]
+
+    def test_workers_run_different_episodes(self):
+        def trajectory_hash(worker_id):
+            with tempfile.TemporaryDirectory() as cwd:
+                output = subprocess.run([sys.executable, os.path.join(os.getcwd(), 'main.py'), '--n-episodes', '3',
+                                         '--no-plot', '--seed', '1', '--sync-dir', os.path.join(cwd, 'sync'),
+                                         '--worker-id', str(worker_id)],
+                                        cwd=cwd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        universal_newlines=True).stdout
+
+            return [line for line in output.split('\n') if 'Trajectory hash' in line][0].split()[-1]
+
+        assert trajectory_hash(0) == trajectory_hash(0)
+        assert trajectory_hash(0) != trajectory_hash(1)
+
+if __name__ == '__main__':
+    unittest.main()
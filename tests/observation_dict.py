@@ -3,6 +3,8 @@ import sys
 import unittest
 sys.path.append(os.getcwd())
 
+import numpy as np
+
 from utils.datastructures import ObservationDict
 from utils.bucketing import MultiBucketer
 
@@ -33,5 +35,76 @@ class TestObservationDict(unittest.TestCase):
 
         assert d[idx][1] == 1
 
+    def test_to_arrays(self):
+        d = ObservationDict(0, 2, None)
+        d[[1, 0]][1] = 2
+        d[[0, 1]][0] = 1
+
+        keys, values = d.to_arrays()
+        assert keys.tolist() == [[0, 1], [1, 0]]
+        assert values.tolist() == [[1, 0], [0, 2]]
+
+    def test_dtype(self):
+        d = ObservationDict(0, 2, None, dtype=np.float16)
+        d[[0, 1]][0] = 0.1
+
+        for i in range(100):
+            d[[i, 0]][1] = i  # grows the table
+
+        assert d[[0, 1]].dtype == np.float16
+        assert d[[0, 1]][0] == np.float16(0.1)
+        assert d.with_base(128)[[0, 1]].dtype == np.float16
+
+    def test_saturate(self):
+        d = ObservationDict(0, 2, None, dtype=np.uint16)
+        d[[0, 1]][0] = d.saturate(65535 + 10)
+
+        assert d[[0, 1]][0] == 65535
+        assert ObservationDict(0, 2, None).saturate(1e9) == 1e9
+
+    def test_lookup_returns_current_values(self):
+        d = ObservationDict(0, 2, None, capacity=1)
+        values, row = d.lookup(d.encode([0, 0]))
+        values[row, 0] = 1
+
+        # the second state id grows (reallocates) the table after the first one was found.
+        values, row, new_row = d.lookup(d.encode([0, 0]), d.encode([0, 1]))
+        values[new_row, 1] = 2
+
+        assert values is d.values
+        assert values[row].tolist() == [1, 0]
+        assert d[[0, 1]].tolist() == [0, 2]
+
+        values, rows = d.lookup_array(d.encode_array(np.array([[1, 1], [0, 0], [1, 1]])))
+
+        assert values is d.values
+        assert values[rows, 0].tolist() == [0, 1, 0]
+
+    def test_rejects_buckets_out_of_range(self):
+        d = ObservationDict(0, 2, None)
+        d[[1, 44]][0] = 1
+
+        for key in [[0, 300], [0, -2], [0, ObservationDict.DEFAULT_BASE - 1]]:
+            with self.assertRaises(ValueError):
+                d[key]
+
+            with self.assertRaises(ValueError):
+                d.encode_array(np.array([[1, 44], key]))
+
+        assert len(d) == 1
+        assert d.encode_array(np.array([[-1, ObservationDict.DEFAULT_BASE - 2]])).tolist() == [d.encode([-1, 254])]
+
+    def test_rejects_non_integer_buckets(self):
+        d = ObservationDict(0, 2, None)
+
+        with self.assertRaises(ValueError):
+            d[[0.7, 0.2]]
+
+        with self.assertRaises(ValueError):
+            d.encode_array(np.array([[0.7, 0.2]]))
+
+        assert len(d) == 0
+        assert d.encode([np.int64(1), 2]) == d.encode([1, 2])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
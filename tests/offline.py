@@ -0,0 +1,83 @@
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from tests.fixtures import make_agent
+from utils.offline import TransitionModel, batch_q_iteration, cumulative_rewards, iter_chunks
+from utils.trajectory import TrajectoryRecorder, TrajectoryReader
+
+class TestOffline(unittest.TestCase):
+    def test_cumulative_rewards(self):
+        rewards = np.array([1.0, 1.0, 1.0, 2.0, 2.0])
+
+        assert cumulative_rewards(rewards, np.array([3, 2])).tolist() == [1, 2, 3, 2, 4]
+
+    def test_chunks_are_whole_episodes(self):
+        with tempfile.TemporaryDirectory() as path:
+            recorder = TrajectoryRecorder(path, n_inputs=2)
+
+            for length in [3, 2, 4]:
+                for _ in range(length):
+                    recorder.record([0.0, 0.0], 0, 1.0, [0.0, 0.0])
+
+                recorder.end_episode()
+
+            recorder.close()
+            chunks = list(iter_chunks(TrajectoryReader(path), chunk_size=5))
+
+            assert [lengths.tolist() for _, lengths in chunks] == [[3, 2], [4]]
+            assert [len(transitions) for transitions, _ in chunks] == [5, 4]
+
+    def test_self_loop_converges(self):
+        agent = make_agent(discount_factor=0.9)
+        model = TransitionModel(agent)
+        model.add([[0.05, 0.05]] * 4, [0, 0, 1, 1], [1.0, 1.0, 0.0, 0.0], [[0.05, 0.05]] * 4)
+
+        batch_q_iteration(agent, model, tol=1e-9)
+
+        # Q(s, 0) = 1 + 0.9 Q(s, 0) and Q(s, 1) = 0.9 Q(s, 0)
+        assert np.allclose(agent.q_table[[0, 0]], [10.0, 9.0])
+        assert agent.action_counts[[0, 0]].tolist() == [2, 2]
+        assert agent.visitation.count(agent.q_table.encode([0, 0])) == 4
+
+    def test_stochastic_transitions_are_averaged(self):
+        agent = make_agent(discount_factor=0.9)
+        model = TransitionModel(agent)
+        # state 0 leads to state 1 (worth 1 per step) half of the time and to state 2 (worth nothing) otherwise.
+        model.add([[0.05, 0.05]] * 2, [0, 0], [0.0, 0.0], [[0.15, 0.05], [0.25, 0.05]])
+        model.add([[0.15, 0.05]], [0], [1.0], [[0.15, 0.05]])
+
+        batch_q_iteration(agent, model, tol=1e-9)
+
+        assert np.isclose(agent.q_table[[0, 0]][0], 0.9 * 0.5 * 10.0)
+
+    def test_chunk_size_does_not_change_result(self):
+        with tempfile.TemporaryDirectory() as path:
+            rng = np.random.RandomState(0)
+            recorder = TrajectoryRecorder(path, n_inputs=2)
+
+            for _ in range(20):
+                for _ in range(rng.randint(1, 10)):
+                    recorder.record(rng.rand(2), rng.randint(2), 1.0, rng.rand(2))
+
+                recorder.end_episode()
+
+            recorder.close()
+            q_values = []
+
+            for chunk_size in [1, 7, 1000]:
+                agent = make_agent(discount_factor=0.9)
+                model = TransitionModel(agent)
+                model.add_recording(TrajectoryReader(path), chunk_size=chunk_size)
+                batch_q_iteration(agent, model, tol=1e-9)
+                q_values.append(agent.q_table.to_arrays()[1])
+
+            assert np.allclose(q_values[0], q_values[1])
+            assert np.allclose(q_values[0], q_values[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+sys.path.append(os.getcwd())
+
+from tests.fixtures import make_agent
+from utils.planning import DynaPlanner
+
+class TestDynaPlanner(unittest.TestCase):
+    def setUp(self):
+        self.agent = make_agent(learning_rate=0.5, discount_factor=0.9)
+        self.planner = DynaPlanner(self.agent, n_steps=10)
+
+    def test_backs_up_observed_transitions(self):
+        self.planner.observe([0.05, 0.05], 1, 1.0, [0.15, 0.05])
+
+        assert self.planner.plan() == 1
+        assert self.agent.q_table[[0, 0]][1] == 0.5
+
+    def test_sweeps_to_predecessors(self):
+        # a chain of states: 0 -> 1 -> 2, where only the last transition is rewarded.
+        self.planner.observe([0.05, 0.05], 0, 0.0, [0.15, 0.05])
+        self.planner.observe([0.15, 0.05], 0, 1.0, [0.25, 0.05])
+
+        for _ in range(5):
+            self.planner.plan()
+
+        assert self.agent.q_table[[1, 0]][0] > 0
+        assert self.agent.q_table[[0, 0]][0] > 0
+
+    def test_queues_each_pair_once(self):
+        # The mean reward (and so the priority) rises with every observation, so the pair is queued again each time.
+        for reward in range(1000):
+            self.planner.observe([0.05, 0.05], 1, float(reward), [0.15, 0.05])
+
+        assert self.planner.n_queued == 1
+        assert len(self.planner.queue) <= 2 * self.planner.n_queued + 64
+        assert self.planner.plan() == 1
+        assert self.planner.plan() == 0
+
+if __name__ == '__main__':
+    unittest.main()
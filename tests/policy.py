@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from tests.fixtures import make_random_agent
+from utils.bucketing import MultiBucketer
+from utils.policy import GreedyPolicy
+
+class TestGreedyPolicy(unittest.TestCase):
+    def setUp(self):
+        self.agent = make_random_agent()
+        self.observations = np.random.RandomState(1).uniform(-1.2, 1.2, size=(500, 2))
+
+    def greedy_actions(self):
+        return [int(np.argmax(self.agent.q_table[self.agent.bucketer(observation)])) for observation in self.observations]
+
+    def test_bucketed_array_matches_bucketer(self):
+        bucketer = MultiBucketer([-1.0, 0.0], [1.0, 1.0], 7)
+        values = np.concatenate((self.observations, np.linspace(-1, 1, 16).reshape(-1, 2) * [1, 0.5]))
+
+        assert bucketer.get_bucketed_array(values).tolist() == [bucketer.get_bucketed(value) for value in values]
+
+    def test_matches_agent(self):
+        policy = GreedyPolicy.from_agent(self.agent)
+
+        assert policy(self.observations).tolist() == self.greedy_actions()
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'policy.npz')
+            GreedyPolicy.from_agent(self.agent).save(path)
+            policy = GreedyPolicy.load(path)
+
+        assert [policy.get_action(observation) for observation in self.observations] == self.greedy_actions()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from tests.fixtures import make_random_agent
+from utils.policy import GreedyPolicy
+from utils.policy_server import OBSERVATION_DTYPE, PolicyClient, PolicyServer
+
+class RecordingPolicy:
+    """Wraps a policy to record the size of every batch the server asks it for."""
+    def __init__(self, policy):
+        self.policy = policy
+        self.input_mask = policy.input_mask
+        self.batch_sizes = []
+
+    def __call__(self, observations):
+        self.batch_sizes.append(len(observations))
+
+        return self.policy(observations)
+
+class TestPolicyServer(unittest.TestCase):
+    def setUp(self):
+        self.policy = RecordingPolicy(GreedyPolicy.from_agent(make_random_agent()))
+        self.observations = np.random.RandomState(1).uniform(-1.2, 1.2, size=(4, 200, 2))
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.tmp_dir.name, 'policy.sock')
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever)
+        self.thread.start()
+        self.serving = None
+
+    def tearDown(self):
+        if self.serving is not None:
+            asyncio.run_coroutine_threadsafe(self.stop_serving(), self.loop).result(timeout=5)
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.tmp_dir.cleanup()
+
+    async def start_serving(self):
+        return asyncio.ensure_future(self.server.serve())
+
+    async def stop_serving(self):
+        self.serving.cancel()
+
+        try:
+            await self.serving
+        except asyncio.CancelledError:
+            pass
+
+    def serve(self, max_batch_size=1024):
+        self.server = PolicyServer(self.policy, self.address, max_batch_size=max_batch_size)
+        self.serving = asyncio.run_coroutine_threadsafe(self.start_serving(), self.loop).result()
+
+        while not os.path.exists(self.address):
+            time.sleep(0.01)
+
+    def expected_actions(self, observations):
+        # The observations are sent as float32, so the server buckets the rounded values.
+        return self.policy.policy(np.asarray(observations).reshape(-1, 2).astype(OBSERVATION_DTYPE))
+
+    def send_simultaneously(self, observations):
+        """Send one request per client while the server's event loop is blocked, so they all arrive together."""
+        clients = [PolicyClient(self.address, n_inputs=2) for _ in observations]
+
+        # A first round trip makes sure the server is waiting on every connection.
+        for client, observation in zip(clients, observations):
+            client.get_action(observation)
+
+        blocked, released = threading.Event(), threading.Event()
+        self.loop.call_soon_threadsafe(lambda: (blocked.set(), released.wait()))
+        blocked.wait()
+        n_batches = len(self.policy.batch_sizes)
+
+        for client, observation in zip(clients, observations):
+            client.sock.sendall(np.asarray(observation, dtype=OBSERVATION_DTYPE).tobytes())
+
+        released.set()
+        actions = [int(np.frombuffer(client.sock.recv(1), dtype=np.int8)[0]) for client in clients]
+
+        for client in clients:
+            client.close()
+
+        return actions, self.policy.batch_sizes[n_batches:]
+
+    def test_responses_match_policy(self):
+        self.serve()
+        actions = np.full(self.observations.shape[:2], -1)
+        barrier = threading.Barrier(len(self.observations))
+
+        def run_client(i):
+            client = PolicyClient(self.address, n_inputs=2)
+            barrier.wait()  # so the clients send their requests at the same time.
+
+            for j, observation in enumerate(self.observations[i]):
+                actions[i, j] = client.get_action(observation)
+
+            client.close()
+
+        clients = [threading.Thread(target=run_client, args=(i,)) for i in range(len(self.observations))]
+
+        for client in clients:
+            client.start()
+
+        for client in clients:
+            client.join()
+
+        assert np.array_equal(actions.ravel(), self.expected_actions(self.observations))
+        assert self.server.n_requests == actions.size
+        assert self.server.n_batches < self.server.n_requests
+
+    def test_batches_simultaneous_requests(self):
+        self.serve()
+        observations = self.observations[:, 0]
+        actions, batch_sizes = self.send_simultaneously(observations)
+
+        assert actions == self.expected_actions(observations).tolist()
+        assert batch_sizes == [4]
+
+    def test_max_batch_size(self):
+        self.serve(max_batch_size=2)
+        observations = self.observations[:, 0]
+        actions, batch_sizes = self.send_simultaneously(observations)
+
+        assert actions == self.expected_actions(observations).tolist()
+        assert batch_sizes == [2, 2]
+
+    def test_lone_requests_are_not_held_back(self):
+        # There is no batching timeout: a request that arrives alone is answered without waiting for others.
+        self.serve()
+        client = PolicyClient(self.address, n_inputs=2)
+        start = time.perf_counter()
+
+        for observation in self.observations[0, :20]:
+            client.get_action(observation)
+
+        elapsed = time.perf_counter() - start
+        client.close()
+
+        assert self.policy.batch_sizes == [1] * 20
+        assert elapsed < 1.0, '20 sequential requests took {:.2f}s'.format(elapsed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import sys
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from utils.projection import project, project_argmax
+
+class TestProjection(unittest.TestCase):
+    def setUp(self):
+        self.keys = np.array([[0, 0, 1], [0, 1, 1], [1, 1, 0], [1, 1, -1]])
+        self.values = np.array([[1.0, 2.0], [5.0, 0.0], [3.0, 4.0], [0.0, 6.0]])
+
+    def test_max_projection(self):
+        projection = project(self.keys, self.values.max(axis=1), [0], n_buckets=2)
+
+        assert projection[0] == 5
+        assert projection[1] == 6
+        assert np.isnan(projection[2])
+
+    def test_mean_projection(self):
+        projection = project(self.keys, self.values.max(axis=1), [0, 1], n_buckets=2, reduce='mean')
+
+        assert projection[0, 0] == 2
+        assert projection[1, 1] == 5
+
+    def test_out_of_range_bucket(self):
+        projection = project(self.keys, self.values.max(axis=1), [2], n_buckets=2, reduce='sum')
+
+        assert projection[-1] == 6
+
+    def test_argmax_projection(self):
+        projection = project_argmax(self.keys, self.values, [0], n_buckets=2)
+
+        assert projection[0] == 0
+        assert projection[1] == 1
+        assert np.isnan(projection[2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.getcwd())
+
+from utils.path import get_run_path
+from utils.run_index import RunIndex
+
+def get_worker_run_path(root):
+    return os.getpid(), get_run_path(prefix=root)
+
+class TestRunPath(unittest.TestCase):
+    def test_same_path_within_process(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = get_run_path(prefix=root)
+
+            assert os.path.isdir(path)
+            assert get_run_path(prefix=root) == path
+            assert get_run_path(prefix=root, new=True) != path
+
+    def test_parallel_processes_get_different_paths(self):
+        with tempfile.TemporaryDirectory() as root:
+            with ProcessPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(get_worker_run_path, [root] * 32))
+
+            # Workers are reused, so each distinct worker should have its own path, and keep it.
+            paths_by_worker = {}
+
+            for pid, path in results:
+                paths_by_worker.setdefault(pid, set()).add(path)
+
+            assert all(len(paths) == 1 for paths in paths_by_worker.values())
+
+            paths = [path for paths in paths_by_worker.values() for path in paths]
+            assert len(set(paths)) == len(paths_by_worker)
+            # every run directory was created exactly once, by one worker.
+            run_numbers = sorted(os.path.basename(path.rstrip('/')) for path in paths)
+            assert sorted(os.listdir(os.path.dirname(paths[0].rstrip('/')))) == run_numbers
+
+class TestRunIndex(unittest.TestCase):
+    def test_records_are_merged(self):
+        with tempfile.TemporaryDirectory() as root:
+            index = RunIndex(root)
+            run_a = get_run_path(prefix=root, new=True)
+            run_b = get_run_path(prefix=root, new=True)
+
+            index.append(run_a, RunIndex.Status.STARTED, config={'n_episodes': 10})
+            index.append(run_b, RunIndex.Status.STARTED)
+            index.append(run_a, RunIndex.Status.FINISHED)
+
+            runs = index.runs()
+            assert list(runs.keys()) == [run_a, run_b]
+            assert runs[run_a]['status'] == RunIndex.Status.FINISHED
+            assert runs[run_a]['config'] == {'n_episodes': 10}
+            assert index.find(RunIndex.Status.STARTED) == [run_b]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from utils.seeding import derive_seed, TrajectoryHasher
+
+def hash_episodes(episodes):
+    hasher = TrajectoryHasher()
+    digests = []
+
+    for episode in episodes:
+        for observation, action, reward in episode:
+            hasher.update(observation, action, reward)
+
+        digests.append(hasher.end_episode())
+
+    return digests, hasher.hexdigest()
+
+class TestDeriveSeed(unittest.TestCase):
+    def test_is_deterministic(self):
+        assert derive_seed(42, 'worker', 3) == derive_seed(42, 'worker', 3)
+        assert 0 <= derive_seed(42, 'worker', 3) < 2 ** 32
+
+    def test_separates_keys(self):
+        seeds = [derive_seed(42, 'worker', 3), derive_seed(42, 'worker', 4), derive_seed(43, 'worker', 3),
+                 derive_seed(42, 'evaluation'), derive_seed(42)]
+
+        assert len(set(seeds)) == len(seeds)
+
+    def test_unseeded(self):
+        assert derive_seed(None) is None
+        assert derive_seed(None, 'worker', 3) is None
+
+class TestTrajectoryHasher(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.episodes = [[(rng.normal(size=4), rng.randint(2), 1.0) for _ in range(10)] for _ in range(3)]
+
+    def test_same_trajectories_same_hashes(self):
+        assert hash_episodes(self.episodes) == hash_episodes(self.episodes)
+
+    def test_single_step_changes_hashes(self):
+        digests, run_digest = hash_episodes(self.episodes)
+
+        observation, action, reward = self.episodes[1][5]
+        self.episodes[1][5] = (observation, 1 - action, reward)
+        changed_digests, changed_run_digest = hash_episodes(self.episodes)
+
+        assert changed_digests[0] == digests[0]
+        assert changed_digests[1] != digests[1]
+        assert changed_digests[2] == digests[2]
+        assert changed_run_digest != run_digest
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+# The time a one episode, headless training run may take, from starting the interpreter to exiting.
+STARTUP_BUDGET = 2.0  # seconds
+
+RUN_MAIN = """
+import runpy, sys
+sys.argv = ['main.py', '--n-episodes', '1', '--no-plot', '--log-verbosity', '0']
+sys.path.insert(0, {root!r})
+runpy.run_path({main!r}, run_name='__main__')
+print('loaded:' + ','.join(name for name in ['matplotlib', 'pandas'] if name in sys.modules))
+"""
+
+class TestStartup(unittest.TestCase):
+    def run_main(self):
+        root = os.getcwd()
+        code = RUN_MAIN.format(root=root, main=os.path.join(root, 'main.py'))
+
+        with tempfile.TemporaryDirectory() as cwd:
+            start = time.time()
+            output = subprocess.run([sys.executable, '-c', code], cwd=cwd, check=True,
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+
+            return output.strip().split('\n')[-1][len('loaded:'):], time.time() - start
+
+    def test_headless_run_does_not_import_plotting(self):
+        loaded, _ = self.run_main()
+
+        assert loaded == '', 'headless run imported: {}'.format(loaded)
+
+    def test_headless_run_within_budget(self):
+        _, elapsed = self.run_main()
+
+        assert elapsed < STARTUP_BUDGET, 'headless run took {:.2f}s, budget is {:.2f}s'.format(elapsed, STARTUP_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
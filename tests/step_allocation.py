@@ -0,0 +1,79 @@
+import os
+import sys
+import tracemalloc
+import unittest
+sys.path.append(os.getcwd())
+
+from gym import make
+import numpy as np
+
+from agent import CartPoleAgent
+
+class TestStepAllocation(unittest.TestCase):
+    """Check that, once the states have been seen, a training step does not allocate memory."""
+    def setUp(self):
+        env = make('CartPole-v0')
+        env.seed(0)
+
+        self.agent = CartPoleAgent(env.action_space, env.observation_space, n_buckets=6, input_mask=[0, 1, 1, 1])
+        self.observations = [env.reset()]
+
+        for _ in range(500):
+            observation, _, done, _ = env.step(env.action_space.sample())
+            self.observations.append(observation if not done else env.reset())
+
+        env.close()
+
+        # Visit every state so that all of the rows exist.
+        for _ in range(3):
+            self.run_steps()
+
+    def run_steps(self):
+        for i in range(len(self.observations) - 1):
+            action = self.agent.get_action(self.observations[i], t=1)
+            self.agent.update(self.observations[i], action, 1.0, self.observations[i + 1], t=1)
+
+    def test_inputs_are_not_modified(self):
+        copies = [observation.copy() for observation in self.observations]
+        self.run_steps()
+
+        for observation, copy in zip(self.observations, copies):
+            assert np.array_equal(observation, copy)
+
+    def test_no_memory_growth(self):
+        tracemalloc.start()
+
+        try:
+            self.run_steps()
+            before = tracemalloc.take_snapshot()
+
+            for _ in range(5):
+                self.run_steps()
+
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        filters = [tracemalloc.Filter(True, os.path.join(os.getcwd(), '*'))]
+        stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+        growth = sum(stat.size_diff for stat in stats)
+
+        # Visit counts are Python ints, so a handful of small objects can be left behind as the counts grow.
+        assert growth < 1024, '{} training steps allocated {} bytes'.format(5 * (len(self.observations) - 1), growth)
+
+    def test_no_large_temporary_allocations(self):
+        tracemalloc.start()
+
+        try:
+            self.run_steps()
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            self.run_steps()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert peak - start < 2048, 'a training step temporarily allocated {} bytes'.format(peak - start)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from utils.logger import Logger, EveryNthEpisodePolicy, EpisodeAggregatePolicy, ReservoirPolicy, make_step_log_policy
+
+def log_episodes(logger, name, episodes):
+    for i_episode, values in enumerate(episodes):
+        logger.start_episode(i_episode)
+
+        for value in values:
+            logger.log_step(name, value)
+
+        logger.end_episode()
+
+class TestStepLogPolicies(unittest.TestCase):
+    def setUp(self):
+        self.logger = Logger()
+
+    def test_full_by_default(self):
+        self.logger.log_step('rewards', 1.0)
+        log_episodes(self.logger, 'rewards', [[2.0]])
+
+        assert self.logger.logs['rewards'] == ['1.0', '[Episode 0]', '2.0']
+
+    def test_full_by_default_during_an_episode(self):
+        log_episodes(self.logger, 'rewards', [[1.0], [2.0]])
+
+        assert self.logger.logs['rewards'] == ['[Episode 0]', '1.0', '[Episode 1]', '2.0']
+
+    def test_policy_errors_are_not_hidden(self):
+        class BrokenPolicy(EveryNthEpisodePolicy):
+            def log_step(self, logger, name, value):
+                raise KeyError(name)
+
+        self.logger.set_policy('rewards', BrokenPolicy(1))
+
+        with self.assertRaises(KeyError):
+            log_episodes(self.logger, 'rewards', [[1.0]])
+
+        assert self.logger.policies['rewards'].__class__ is BrokenPolicy
+
+    def test_every_nth_episode(self):
+        self.logger.set_policy('rewards', EveryNthEpisodePolicy(2))
+        log_episodes(self.logger, 'rewards', [[1.0], [2.0], [3.0]])
+
+        assert self.logger.logs['rewards'] == ['[Episode 0]', '1.0', '[Episode 2]', '3.0']
+
+    def test_episode_aggregates(self):
+        self.logger.set_policy('rewards', EpisodeAggregatePolicy())
+        self.logger.set_policy('observations', EpisodeAggregatePolicy())
+
+        for i_episode in range(2):
+            self.logger.start_episode(i_episode)
+
+            for value in [1.0, 2.0, 6.0]:
+                self.logger.log_step('rewards', value * (i_episode + 1))
+                self.logger.log_step('observations', np.array([value, -value]))
+
+            self.logger.end_episode()
+
+        rewards = self.logger.log_to_dataframe('rewards')
+        observations = self.logger.log_to_dataframe('observations')
+
+        assert rewards['sum'].tolist() == [9, 18]
+        assert rewards['mean'].tolist() == [3, 6]
+        assert rewards['max'].tolist() == [6, 12]
+        assert observations['min_1'].tolist() == [-6, -6]
+        assert observations['steps'].tolist() == [3, 3]
+
+    def test_reservoir_sample(self):
+        self.logger.set_policy('actions', ReservoirPolicy(5, seed=0))
+        log_episodes(self.logger, 'actions', [range(10)] * 10)
+        self.logger.policies['actions'].flush(self.logger, 'actions')
+
+        sample = self.logger.log_to_dataframe('actions')
+
+        assert len(sample) == 5
+        assert sample[['episode', 'step']].drop_duplicates().shape[0] == 5
+        assert (sample['step'] == sample['value']).all()
+
+    def test_invalid_sizes(self):
+        for n in [0, -1]:
+            with self.assertRaises(ValueError):
+                make_step_log_policy('every-nth', every_n=n)
+
+            with self.assertRaises(ValueError):
+                make_step_log_policy('reservoir', reservoir_size=n)
+
+if __name__ == '__main__':
+    unittest.main()
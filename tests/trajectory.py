@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from utils.trajectory import TrajectoryRecorder, TrajectoryReader
+
+def record_episodes(recorder, lengths):
+    step = 0
+
+    for length in lengths:
+        for t in range(length):
+            recorder.record(np.full(4, step), step % 2, 1.0, np.full(4, step + 1), t == length - 1)
+            step += 1
+
+        recorder.end_episode()
+
+class TestTrajectory(unittest.TestCase):
+    def test_read_episodes(self):
+        with tempfile.TemporaryDirectory() as path:
+            recorder = TrajectoryRecorder(path, capacity=2)
+            record_episodes(recorder, [3, 5, 2])
+            recorder.close()
+
+            reader = TrajectoryReader(path)
+
+            assert len(reader) == 3
+            assert len(reader.steps(0, 10)) == 10
+            assert reader[1]['observation'][:, 0].tolist() == [3, 4, 5, 6, 7]
+            assert reader[1]['action'].tolist() == [1, 0, 1, 0, 1]
+            assert reader[1]['done'].tolist() == [False] * 4 + [True]
+            assert [episode['reward'].sum() for episode in reader] == [3, 5, 2]
+
+    def test_files_are_valid_npy(self):
+        with tempfile.TemporaryDirectory() as path:
+            recorder = TrajectoryRecorder(path, capacity=2)
+            record_episodes(recorder, [3, 5])
+            recorder.close()
+
+            transitions = np.load(os.path.join(path, 'transitions.npy'))
+            episodes = np.load(os.path.join(path, 'episodes.npy'))
+
+            assert transitions.shape == (8,)
+            assert episodes.tolist() == [(0, 3), (3, 5)]
+
+    def test_read_while_recording(self):
+        with tempfile.TemporaryDirectory() as path:
+            recorder = TrajectoryRecorder(path, capacity=2)
+            record_episodes(recorder, [3])
+            recorder.flush()
+            record_episodes(recorder, [5])
+
+            reader = TrajectoryReader(path)
+
+            assert len(reader) == 1
+            assert len(reader.transitions) == 3
+
+            recorder.close()
+
+            assert len(TrajectoryReader(path)) == 2
+
+if __name__ == '__main__':
+    unittest.main()
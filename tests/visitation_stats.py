@@ -0,0 +1,60 @@
+import os
+import sys
+import unittest
+sys.path.append(os.getcwd())
+
+from utils.datastructures import ObservationDict
+from utils.visitation import VisitationStats
+
+class TestVisitationStats(unittest.TestCase):
+    def test_counts_visits(self):
+        stats = VisitationStats(2, 4)
+
+        for state in [[0, 1], [0, 1], [2, 3]]:
+            stats.visit(state)
+
+        assert stats.count([0, 1]) == 2
+        assert stats.count([2, 3]) == 1
+        assert stats.count([1, 1]) == 0
+        assert len(stats) == 2
+        assert stats.n_visits == 3
+
+    def test_hot_states(self):
+        stats = VisitationStats(1, 10)
+
+        for state in range(5):
+            for _ in range(state + 1):
+                stats.visit([state])
+
+        assert stats.hot_states(3) == [((4,), 5), ((3,), 4), ((2,), 3)]
+        assert len(stats.hot_states(100)) == 5
+
+        for _ in range(10):
+            stats.visit([0])
+
+        assert stats.hot_states(1) == [((0,), 11)]
+
+    def test_marginals_and_coverage(self):
+        stats = VisitationStats(2, 3)
+        stats.visit([0, 1])
+        stats.visit([0, -1])
+
+        assert list(stats.marginal(0)) == [2, 0, 0, 0]
+        assert list(stats.marginal(1)) == [0, 1, 0, 1]
+        assert stats.coverage() == 2 / 16
+        assert list(stats.dim_coverage()) == [0.25, 0.5]
+
+    def test_state_ids(self):
+        table = ObservationDict(0, 2, base=8, n_dims=2)
+        stats = VisitationStats(2, 4, table=table)
+        stats.visit(table.encode([0, 1]), buckets=[0, 1])
+        stats.visit(table.encode([0, 1]))
+        stats.visit([2, 3])
+
+        assert stats.count([0, 1]) == 2
+        assert stats.count(table.encode([2, 3])) == 1
+        assert stats.hot_states(2) == [((0, 1), 2), ((2, 3), 1)]
+        assert list(stats.marginal(0)) == [2, 0, 1, 0, 0]
+
+if __name__ == '__main__':
+    unittest.main()
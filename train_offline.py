@@ -0,0 +1,61 @@
+import argparse
+import glob
+import os
+import time
+
+import gym
+
+from utils.annealing import Step, ExponentialDecay
+from utils.offline import TransitionModel, batch_q_iteration
+from utils.trajectory import TrajectoryReader
+from agent import CartPoleAgent
+
+parser = argparse.ArgumentParser(description='Train a Q-Learning agent on recorded trajectories (see main.py --record-trajectories), \
+without running the environment.')
+parser.add_argument('paths', type=str, nargs='+', help='the trajectory directories, or run directories that contain them.')
+parser.add_argument('--n-buckets', type=int, default=6, help='how many buckets to separate the observation space into.')
+parser.add_argument('--input-mask', type=int, nargs='+', default=[0, 1, 1, 1], help='the input mask of the agent.')
+parser.add_argument('--discount-factor', type=float, default=0.9, help='the discount factor (gamma).')
+parser.add_argument('--step-rewards', action='store_true', help='flag to indicate the reward of each step should be used instead of \
+the cumulative reward of the episode (which is what main.py trains with).')
+parser.add_argument('--max-sweeps', type=int, default=1000, help='the maximum number of batch Q-iteration sweeps.')
+parser.add_argument('--tol', type=float, default=1e-6, help='the largest change to a Q-value for the Q-values to be considered converged.')
+parser.add_argument('--chunk-size', type=int, default=65536, help='the maximum number of transitions to read into memory at once.')
+parser.add_argument('--model-name', type=str, default='RoleyPoley-offline', help='the name of the model. Used as the filename when saving the model.')
+
+args = parser.parse_args()
+
+trajectory_paths = []
+
+for path in args.paths:
+    if os.path.isfile(os.path.join(path, 'transitions.npy')):
+        trajectory_paths.append(path)
+    else:
+        trajectory_paths += sorted(os.path.dirname(match) for match in glob.glob(os.path.join(path, '**', 'transitions.npy'), recursive=True))
+
+if len(trajectory_paths) == 0:
+    parser.error('no recorded trajectories were found in: {}'.format(', '.join(args.paths)))
+
+env = gym.make('CartPole-v0')
+agent = CartPoleAgent(env.action_space, env.observation_space,
+                        n_buckets=args.n_buckets, learning_rate=1, learning_rate_annealing=ExponentialDecay(k=1e-3),
+                        exploration_rate=1, exploration_rate_annealing=Step(k=2e-2, step_after=100),
+                        discount_factor=args.discount_factor, input_mask=args.input_mask)
+env.close()
+
+start = time.time()
+model = TransitionModel(agent)
+
+for path in trajectory_paths:
+    model.add_recording(TrajectoryReader(path), chunk_size=args.chunk_size, cumulative=not args.step_rewards)
+
+print('Loaded {} transitions from {} recording(s) over {} states in {:.2f}s'.format(len(model), len(trajectory_paths),
+                                                                                 len(agent.q_table), time.time() - start))
+
+start = time.time()
+n_sweeps, delta = batch_q_iteration(agent, model, max_sweeps=args.max_sweeps, tol=args.tol)
+
+print('{} after {} sweeps in {:.2f}s (largest change in the last sweep: {:.3g})'.format(
+    'Converged' if delta <= args.tol else 'Did not converge', n_sweeps, time.time() - start, delta))
+
+agent.save(args.model_name + '.q')
@@ -0,0 +1,165 @@
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import os
+
+import numpy as np
+
+from utils.run_index import RunIndex
+
+CACHE_DIR = '.cache'
+
+def _date_prefix(path, data_root):
+    """Get the date of a date directory (see get_run_path()) relative to the data directory, e.g. (2018, 12) for
+    'data/2018/12', or None if the path is not a date directory."""
+    parts = os.path.relpath(path, data_root).split(os.sep)
+
+    if len(parts) > 3 or not all(part.isdigit() for part in parts):
+        return None
+
+    return tuple(int(part) for part in parts)
+
+def find_runs(root, name='episode_info', status=None):
+    """Find all of the run directories under a directory.
+
+    The runs are read from the run index (see RunIndex) of the data directory that root is in, so no directories have to
+    be searched for the runs that main.py recorded in the index. Only the runs that predate the index are found by
+    searching for log files: the date directories after the index was started, and the directories of indexed runs,
+    are skipped.
+
+    Arguments:
+        root: the directory to search, e.g. 'data/' or 'data/2018/12/07/'.
+        name: the name of the log file a directory must contain to count as a run. Not used for indexed runs.
+        status: if set, only the runs in the run index with this status are returned. Runs that are not in the index
+                do not have a status, so they are left out.
+
+    Returns: a sorted list of the paths of the run directories, relative to the same directory as root.
+    """
+    abs_root = os.path.abspath(root)
+    index = RunIndex.open_for(root)
+    runs = set()
+    indexed = set()
+    data_root, start = None, None
+
+    if index is not None:
+        data_root = index.root
+        start = index.start_date()
+
+        for run_path, record in index.runs().items():
+            run_path = os.path.normpath(run_path)
+
+            if os.path.commonpath([abs_root, run_path]) != abs_root:
+                continue  # not under root.
+
+            indexed.add(run_path)
+
+            if status is None or record['status'] == status:
+                runs.add(os.path.normpath(os.path.join(root, os.path.relpath(run_path, abs_root))))
+
+    if status is not None:
+        return sorted(runs)
+
+    def is_indexed_date(path):
+        if start is None:
+            return False
+
+        date = _date_prefix(path, data_root)
+
+        return date is not None and date > (start.year, start.month, start.day)[:len(date)]
+
+    if is_indexed_date(abs_root):
+        return sorted(runs)
+
+    suffix = '{}.log'.format(name)
+
+    for dirpath, dirnames, filenames in os.walk(abs_root):
+        # Skip indexed runs and dates, and hidden directories (e.g. the caches of parsed logs).
+        dirnames[:] = [dirname for dirname in dirnames if not dirname.startswith('.')
+                       and os.path.join(dirpath, dirname) not in indexed
+                       and not is_indexed_date(os.path.join(dirpath, dirname))]
+
+        if any(filename.endswith(suffix) for filename in filenames):
+            runs.add(os.path.normpath(os.path.join(root, os.path.relpath(dirpath, abs_root))))
+
+    return sorted(runs)
+
+def load_episode_lengths(run_path, name='episode_info'):
+    """Load the number of timesteps of each episode of a run.
+
+    The parsed log is cached in the run directory, keyed by the modification time of the log file, so the log is only
+    parsed again after it has changed.
+
+    Arguments:
+        run_path: the directory that contains the log files of the run.
+        name: the name of the log file that contains the episode info.
+
+    Returns: an array with the number of timesteps of each episode, or None if the run has no such log.
+    """
+    matching_files = sorted(glob.glob(os.path.join(run_path, '*{}.log'.format(name))))
+
+    if len(matching_files) == 0:
+        return
+
+    filename = matching_files[0]
+    mtime = os.stat(filename).st_mtime_ns
+    cache_path = os.path.join(run_path, CACHE_DIR, os.path.basename(filename) + '.npz')
+
+    try:
+        with np.load(cache_path) as cache:
+            if cache['mtime'] == mtime:
+                return cache['timesteps']
+    except (OSError, KeyError, ValueError):
+        pass
+
+    import pandas as pd
+
+    df = pd.read_csv(filename, comment='[')  # ignore timestamps starting with '['
+    timesteps = df[df.columns[1]].values.astype(np.int64)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        np.savez(cache_path, mtime=mtime, timesteps=timesteps)
+    except OSError:
+        pass  # caching is only an optimisation, so read-only run directories are fine.
+
+    return timesteps
+
+def load_runs(run_paths, n_workers=None):
+    """Load the episode lengths of many runs in parallel.
+
+    Arguments:
+        run_paths: the directories of the runs to load.
+        n_workers: the number of worker processes. Defaults to the number of CPUs.
+
+    Returns: a dictionary mapping the path of each run that has an episode log to its episode lengths.
+    """
+    if len(run_paths) <= 1:
+        results = map(load_episode_lengths, run_paths)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(load_episode_lengths, run_paths, chunksize=max(len(run_paths) // 64, 1)))
+
+    return {path: lengths for path, lengths in zip(run_paths, results) if lengths is not None}
+
+def mean_confidence_interval(runs, z=1.96):
+    """Compute the mean and confidence interval of the episode lengths across runs.
+
+    Runs may have different numbers of episodes. The statistics for an episode use only the runs that reached it.
+
+    Arguments:
+        runs: a list of arrays with the episode lengths of each run.
+        z: the z-score of the confidence interval, e.g. 1.96 for a 95% confidence interval.
+
+    Returns: three arrays with one element per episode: the mean, the lower bound, and the upper bound.
+    """
+    n_episodes = max(len(lengths) for lengths in runs)
+    padded = np.full((len(runs), n_episodes), np.nan)
+
+    for i, lengths in enumerate(runs):
+        padded[i, :len(lengths)] = lengths
+
+    n = np.sum(~np.isnan(padded), axis=0)
+    mean = np.nanmean(padded, axis=0)
+    std = np.nanstd(padded, axis=0)
+    half_width = z * std / np.sqrt(n)
+
+    return mean, mean - half_width, mean + half_width
@@ -1,3 +1,7 @@
+from bisect import bisect_right
+
+import numpy as np
+
 class BuckterInterface:
     """Interface for bucketers."""
     def get_bucketed(self, value):
@@ -69,9 +73,73 @@ class MultiBucketer(BuckterInterface):
         self.n = len(lower_bounds)
         self.n_buckets = n_buckets
         self.bucketers = [Bucketer(lower, upper, n_buckets) for (lower, upper) in zip(lower_bounds, upper_bounds)]
+        self._init_buffers()
+
+    def _init_buffers(self):
+        """Precompute the boundaries of every bucket.
+
+        The boundaries are computed with exactly the same arithmetic (and precision) as in Bucketer, so a value that
+        lies between boundaries[k] and boundaries[k + 1] of a dimension is in bucket k.
+        """
+        self.boundaries = []
+
+        with np.errstate(over='ignore'):
+            for bucketer in self.bucketers:
+                step_size = abs(bucketer.lower_bound) / self.n_buckets + abs(bucketer.upper_bound) / self.n_buckets
+                self.boundaries.append([float(bucketer.lower_bound + bucket * step_size) for bucket in range(self.n_buckets + 1)])
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        if 'boundaries' not in state:
+            self._init_buffers()
+
+    @property
+    def key_base(self):
+        """The smallest base that can encode every bucket (-1 to n_buckets) as a digit of a state id."""
+        return self.n_buckets + 2
 
     def get_bucketed(self, values):
         return [bucketer.get_bucketed(value) for (bucketer, value) in zip(self.bucketers, values)]
 
+    def get_bucketed_array(self, values):
+        """Bucket many vectors at once.
+
+        Gives the same buckets as get_bucketed(), but works on a whole array of vectors with numpy operations.
+
+        Arguments:
+            values: a (n_vectors, n) array of values to discretise.
+
+        Returns: a (n_vectors, n) integer array of the bucketed values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        buckets = np.zeros(values.shape, dtype=int)
+
+        for dim, boundaries in enumerate(self.boundaries):
+            buckets[:, dim] = np.searchsorted(boundaries, values[:, dim], side='right') - 1
+
+        buckets[(buckets < 0) | (buckets >= self.n_buckets)] = -1
+
+        return buckets
+
+    def get_bucketed_into(self, values, out, indices=None):
+        """Bucket a vector into an existing list or array.
+
+        Gives the same buckets as get_bucketed(), but does not create any lists or arrays, so it can be called every
+        step.
+
+        Arguments:
+            values: the values to discretise.
+            out: a list or array with n elements that the buckets are written to.
+            indices: the indices of the n elements of values to discretise. Defaults to the first n elements.
+
+        Returns: out.
+        """
+        for dim, boundaries in enumerate(self.boundaries):
+            bucket = bisect_right(boundaries, values[dim if indices is None else indices[dim]]) - 1
+            out[dim] = bucket if 0 <= bucket < self.n_buckets else -1
+
+        return out
+
     def __call__(self, values):
         return self.get_bucketed(values)
\ No newline at end of file
@@ -0,0 +1,177 @@
+from datetime import datetime
+from io import BytesIO
+import re
+
+import numpy as np
+
+from agent import CartPoleAgent
+from utils.path import get_run_path, write_atomic
+
+CHECKPOINT_PATTERN = re.compile(r'^(.*)-checkpoint-([0-9]+)\.(q|delta\.npz)$')
+TABLES = ['q_table', 'action_counts']
+
+def full_checkpoint_filename(model_name, checkpoint):
+    return '{}-checkpoint-{:03d}.q'.format(model_name, checkpoint)
+
+def delta_checkpoint_filename(model_name, checkpoint):
+    return '{}-checkpoint-{:03d}.delta.npz'.format(model_name, checkpoint)
+
+def _snapshot(table):
+    return table.state_ids[:table.n_rows].copy(), table.values[:table.n_rows].copy()
+
+def _changed_rows(table, snapshot):
+    """Find the rows of a table that were added or changed since a snapshot was taken.
+
+    The rows are matched by state id rather than position, so this also works if the table was replaced (e.g. when a
+    worker syncs with other workers).
+    """
+    state_ids, values = table.state_ids[:table.n_rows], table.values[:table.n_rows]
+    old_state_ids, old_values = snapshot
+
+    if len(old_state_ids) == 0:
+        return np.arange(table.n_rows)
+
+    order = np.argsort(old_state_ids)
+    positions = np.minimum(np.searchsorted(old_state_ids[order], state_ids), len(order) - 1)
+    found = old_state_ids[order][positions] == state_ids
+    changed = ~found | np.any(values != old_values[order][positions], axis=1)
+
+    return np.flatnonzero(changed)
+
+class DeltaCheckpointer:
+    """Saves the checkpoints of an agent as a full model every few checkpoints and as deltas in between.
+
+    A delta only holds the cells of the Q-table and action counts that were added or changed since the previous
+    checkpoint (the dirty states), so the size of a delta depends on how much the agent learnt rather than the size of
+    its tables. The dirty states are found by comparing the tables with a copy taken at the previous checkpoint, so
+    changes made by anything (the agent, a planner, a sync with other workers) are picked up.
+
+    Use load_checkpoint() to reconstruct the agent of any checkpoint. For example, with full_rate=3:
+    data/yyyy/mm/dd/run/001
+    \t\t\t\t|- RoleyPoley-checkpoint-000.q
+    \t\t\t\t|- RoleyPoley-checkpoint-001.delta.npz
+    \t\t\t\t|- RoleyPoley-checkpoint-002.delta.npz
+    \t\t\t\t|- RoleyPoley-checkpoint-003.q
+    """
+    def __init__(self, agent, model_name, full_rate=10):
+        """Create a checkpointer for an agent.
+
+        Arguments:
+            agent: the CartPoleAgent to checkpoint.
+            model_name: the name of the model, used as the prefix of the checkpoint filenames.
+            full_rate: how often a full checkpoint should be saved (in checkpoints). Set to 1 to only save full checkpoints.
+        """
+        self.agent = agent
+        self.model_name = model_name
+        self.full_rate = full_rate
+        self.base = None
+        self.snapshots = None
+
+    def save(self, checkpoint):
+        """Save a checkpoint.
+
+        Arguments:
+            checkpoint: the number of the checkpoint.
+
+        Returns: the path the checkpoint was saved to.
+        """
+        if self.base is None or checkpoint - self.base >= self.full_rate:
+            path = self.agent.save(full_checkpoint_filename(self.model_name, checkpoint))
+            self.base = checkpoint
+        else:
+            path = self.save_delta(checkpoint)
+
+        if self.full_rate > 1:
+            self.snapshots = {name: _snapshot(getattr(self.agent, name)) for name in TABLES}
+
+        return path
+
+    def save_delta(self, checkpoint):
+        arrays = dict(base=self.base)
+        n_changed = 0
+
+        for name in TABLES:
+            table = getattr(self.agent, name)
+            rows = _changed_rows(table, self.snapshots[name])
+            arrays[name + '_state_ids'] = table.state_ids[rows]
+            arrays[name + '_values'] = table.values[rows]
+            n_changed = max(n_changed, len(rows))
+
+        if self.agent.model_path is None:
+            self.agent.model_path = get_run_path(prefix='data/')
+
+        path = self.agent.model_path + delta_checkpoint_filename(self.model_name, checkpoint)
+        f = BytesIO()
+        np.savez(f, **arrays)
+        write_atomic(path, f.getvalue())
+
+        print('[{}] Saving delta checkpoint ({} changed states) to: {}'.format(datetime.now(), n_changed, path))
+
+        return path
+
+def apply_delta(agent, path, rebuild_visitation=True):
+    """Apply a delta checkpoint to the agent of the previous checkpoint.
+
+    Arguments:
+        agent: the agent of the previous checkpoint. It is modified in place.
+        path: the path of the delta checkpoint.
+        rebuild_visitation: whether to update the visitation statistics. Can be skipped when applying several deltas.
+
+    Returns: the agent.
+    """
+    with np.load(path) as delta:
+        for name in TABLES:
+            table = getattr(agent, name)
+            values, rows = table.lookup_array(delta[name + '_state_ids'])
+            values[rows] = delta[name + '_values']
+
+    if rebuild_visitation:
+        agent.rebuild_visitation()
+
+    return agent
+
+def parse_checkpoint_path(path):
+    """Split the path of a checkpoint into its parts.
+
+    Arguments:
+        path: the path of a full ('.q') or delta ('.delta.npz') checkpoint.
+
+    Returns: the path without the '-checkpoint-NNN...' suffix, the checkpoint number, and whether it is a delta, or None
+             if the path is not a checkpoint.
+    """
+    match = CHECKPOINT_PATTERN.match(path)
+
+    if not match:
+        return None
+
+    return match.group(1), int(match.group(2)), match.group(3) != 'q'
+
+def load_checkpoint(path):
+    """Load the agent of any checkpoint, full or delta.
+
+    The agent of a delta checkpoint is reconstructed by loading its full base checkpoint and replaying every delta from
+    the base up to the checkpoint.
+
+    Arguments:
+        path: the path of the checkpoint.
+
+    Returns: the agent as it was at the checkpoint.
+    """
+    parsed = parse_checkpoint_path(path)
+
+    if parsed is None or not parsed[2]:
+        return CartPoleAgent.load(path)
+
+    prefix, checkpoint, _ = parsed
+
+    with np.load(path) as delta:
+        base = int(delta['base'])
+
+    agent = CartPoleAgent.load(full_checkpoint_filename(prefix, base))
+
+    for i in range(base + 1, checkpoint + 1):
+        apply_delta(agent, delta_checkpoint_filename(prefix, i), rebuild_visitation=False)
+
+    agent.rebuild_visitation()
+
+    return agent
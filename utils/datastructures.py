@@ -1,72 +1,269 @@
 from io import StringIO
 
-from numpy import full
-import pandas as pd
+import numpy as np
 
 class ObservationDict:
     """An ObservationDict is a dictionary that maps observations to a list of values.
     Each observation maps up to n_actions number of values, where n_actions is the number
     of actions in the action space.
+
+    The values are stored as rows of a single 2-D array that grows as needed. A bucketed observation is encoded as an
+    integer state id (each bucket is a digit in base `base`) and the table maps state ids to rows. Code that runs
+    every step can work with state ids and rows directly (see encode() and lookup()) to avoid creating any keys.
     """
-    def __init__(self, init_value, n_actions, bucketer=None):
+    DEFAULT_BASE = 256
+
+    def __init__(self, init_value, n_actions, bucketer=None, base=None, n_dims=None, capacity=64, dtype=float):
         """
         Arguments:
             init_value: the value to initialise cells with.
             n_actions: the number of actions in the problem action space.
-            bucketer: the method used to bucket observations. Defaults to None, but if set observations will be 
+            bucketer: the method used to bucket observations. Defaults to None, but if set observations will be
                       bucketed using this method automatically in get().
+            base: the base used to encode bucketed observations as state ids. Must be larger than the number of
+                  possible buckets plus one (buckets can be -1). Defaults to the key base of the bucketer if set,
+                  otherwise DEFAULT_BASE.
+            n_dims: the number of values in a bucketed observation. Defaults to the length of the first key used.
+            capacity: the number of cells to initially allocate space for.
+            dtype: the type the values are stored as, e.g. np.float32 for Q-values or np.uint16 for counts. Use
+                   saturate() when adding to integer values so they do not overflow.
         """
-        self.table = {}
         self.init_value = init_value
         self.n_actions = n_actions
         self.bucketer = bucketer
 
+        if base is None:
+            base = bucketer.key_base if bucketer else ObservationDict.DEFAULT_BASE
+
+        self.base = base
+        self.n_dims = None
+        self.place_values = None
+        self.offset = 0
+        self.index = {}
+        self.n_rows = 0
+        self.state_ids = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((capacity, n_actions), init_value, dtype=dtype)
+        self._set_max_value()
+
+        if n_dims is not None:
+            self._set_dims(n_dims)
+
+    def _set_max_value(self):
+        self.max_value = np.iinfo(self.values.dtype).max if np.issubdtype(self.values.dtype, np.integer) else np.inf
+
+    def saturate(self, values):
+        """Clip values to the largest value the table can store, so that adding to integer values saturates
+        instead of wrapping around.
+
+        Arguments:
+            values: the values (e.g. counts after an increment) to clip, computed in a wider type.
+
+        Returns: the clipped values.
+        """
+        return np.minimum(values, self.max_value)
+
+    def _set_dims(self, n_dims):
+        assert self.base ** n_dims < 2 ** 63, 'state ids do not fit in 64 bits.'
+
+        self.n_dims = n_dims
+        self.place_values = [self.base ** (n_dims - 1 - dim) for dim in range(n_dims)]
+        # Buckets start at -1, so every digit is offset by one.
+        self.offset = sum(self.place_values)
+
+    def encode(self, key):
+        """Encode a bucketed observation as a state id.
+
+        Arguments:
+            key: the bucketed observation, as a sequence or an integer array.
+
+        Returns: the integer state id of the observation. A ValueError is raised if a bucket is not an integer from -1 to
+                 base - 2, since it would be encoded as the state id of another observation.
+        """
+        if self.place_values is None:
+            self._set_dims(len(key))
+        elif len(key) != self.n_dims:
+            raise ValueError('Expected an observation with {} values, got {}.'.format(self.n_dims, len(key)))
+
+        state_id = self.offset
+
+        for bucket, place_value in zip(key, self.place_values):
+            if not isinstance(bucket, (int, np.integer)) or not -1 <= bucket <= self.base - 2:
+                self._invalid_key(key)
+
+            state_id += int(bucket) * place_value
+
+        return state_id
+
+    def _invalid_key(self, key):
+        raise ValueError('Invalid observation {}: buckets must be integers from -1 to {}.'.format(list(key), self.base - 2))
+
+    def encode_array(self, keys):
+        """Encode many bucketed observations as state ids at once.
+
+        Arguments:
+            keys: a (n_observations, n_dims) integer array of bucketed observations.
+
+        Returns: an int64 array with the state id of each observation. A ValueError is raised if a bucket is not an
+                 integer from -1 to base - 2, like encode().
+        """
+        keys = np.asarray(keys)
+
+        if keys.size > 0:
+            if keys.dtype.kind not in 'iu':
+                raise ValueError('Invalid observations: buckets must be integers, got {}.'.format(keys.dtype))
+
+            invalid = np.any((keys < -1) | (keys > self.base - 2), axis=-1)
+
+            if np.any(invalid):
+                self._invalid_key(keys[invalid][0].tolist())
+
+        keys = keys.astype(np.int64)
+
+        if self.place_values is None:
+            self._set_dims(keys.shape[1])
+
+        return self.offset + keys @ np.array(self.place_values, dtype=np.int64)
+
+    def decode(self, state_id):
+        """Decode a state id back into a bucketed observation.
+
+        Arguments:
+            state_id: the integer state id.
+
+        Returns: the bucketed observation as a tuple.
+        """
+        key = []
+
+        for _ in range(self.n_dims):
+            state_id, digit = divmod(state_id, self.base)
+            key.append(digit - 1)
+
+        return tuple(reversed(key))
+
+    def lookup(self, *state_ids):
+        """Find the rows of the values array for one or more state ids.
+        Missing cells are lazily created.
+
+        Adding a cell may reallocate the values array, so the array is returned together with the rows: it is the
+        array that holds every one of the rows, which self.values read before (or in between) the lookups may not be.
+
+        Arguments:
+            state_ids: the integer state ids, as given by encode().
+
+        Returns: a tuple of the values array followed by the index of the row of each state id, e.g.
+                 values, row = table.lookup(state_id).
+        """
+        rows = tuple(map(self._row, state_ids))
+
+        return (self.values,) + rows
+
+    def lookup_array(self, state_ids):
+        """Find the rows of the values array for many state ids at once.
+        Missing cells are lazily created.
+
+        Arguments:
+            state_ids: an integer array of state ids, as given by encode_array().
+
+        Returns: the values array (see lookup()) and an int64 array with the row of each state id.
+        """
+        unique, inverse = np.unique(state_ids, return_inverse=True)
+        rows = np.array([self._row(int(state_id)) for state_id in unique], dtype=np.int64)[inverse]
+
+        return self.values, rows
+
+    def _row(self, state_id):
+        try:
+            return self.index[state_id]
+        except KeyError:
+            return self._add(state_id)
+
+    def _add(self, state_id):
+        if self.n_rows == len(self.values):
+            capacity = 2 * len(self.values)
+
+            state_ids = np.zeros(capacity, dtype=np.int64)
+            state_ids[:self.n_rows] = self.state_ids
+            values = np.full((capacity, self.n_actions), self.init_value, dtype=self.values.dtype)
+            values[:self.n_rows] = self.values
+
+            self.state_ids = state_ids
+            self.values = values
+
+        row = self.n_rows
+        self.index[state_id] = row
+        self.state_ids[row] = state_id
+        self.n_rows += 1
+
+        return row
+
     def get(self, observation):
         """Find the cell in the lookup table for the given observation.
         Missing cells are lazily created.
-        
+
+        Note that the table is reallocated when it grows, so the reference should not be kept around after new cells
+        may have been added (see lookup()).
+
         Arguments:
             observation: the observation for the cell to retrieve.
-        
+
         Returns: a reference to the table cell corresonding to the given observation.
         """
-        cell = self.table
-
         if self.bucketer:
             observation = self.bucketer(observation)
 
-        for i, key in enumerate(observation):
-            try:
-                cell = cell[key]
-            except KeyError:
-                cell[key] = {} if i != len(observation) - 1 else full(self.n_actions, self.init_value, dtype=float)
-                cell = cell[key]
+        values, row = self.lookup(self.encode(observation))
 
-        return cell 
+        return values[row]
 
     def __getitem__(self, key):
         return self.get(key)
 
+    def __len__(self):
+        return self.n_rows
+
+    def to_arrays(self):
+        """Convert the table to a pair of dense arrays.
+
+        Returns: a (n_cells, n_dims) integer array of keys and a (n_cells, n_actions) array of values, both sorted by key.
+        """
+        if self.n_rows == 0:
+            return np.zeros((0, 0), dtype=int), np.zeros((0, self.n_actions), dtype=self.values.dtype)
+
+        order = np.argsort(self.state_ids[:self.n_rows])
+        state_ids = self.state_ids[order]
+        keys = np.zeros((self.n_rows, self.n_dims), dtype=int)
+
+        for dim in reversed(range(self.n_dims)):
+            keys[:, dim] = state_ids % self.base - 1
+            state_ids = state_ids // self.base
+
+        return keys, self.values[order]
+
+    def items(self):
+        """Iterate over the cells of the table, sorted by key.
+
+        Yields: (key, values) pairs where key is a tuple of the bucketed observation and values is a reference to the
+                array of values for each action.
+        """
+        order = np.argsort(self.state_ids[:self.n_rows])
+
+        for row in order:
+            yield self.decode(int(self.state_ids[row])), self.values[row]
+
     def flatten(self, include_key=True):
-        for a in sorted(self.table.keys()):
-            for b in sorted(self.table[a].keys()):
-                for c in sorted(self.table[a][b].keys()):
-                    for d in sorted(self.table[a][b][c].keys()):
-                        key = [a, b, c, d]
-                        row = [key] if include_key else []
+        for key, values in self.items():
+            row = [list(key)] if include_key else []
 
-                        for value in self.table[a][b][c][d]:
-                            row.append(value)
+            for value in values:
+                row.append(value)
 
-                        yield row
+            yield row
 
     def to_csv(self):
-        result = 'observation, action_0, action_1\n'
+        result = 'observation, ' + ', '.join('action_{}'.format(action) for action in range(self.n_actions)) + '\n'
 
         for row in self.flatten():
-            result += '{}, {}, {}\n'.format(''.join(map(lambda x: str(x), row[0])), 
-                                            row[1], 
-                                            row[2])
+            result += '{}, {}\n'.format(''.join(map(lambda x: str(x), row[0])), ', '.join(map(str, row[1:])))
 
         return result
 
@@ -75,7 +272,47 @@ class ObservationDict:
 
         Returns: the dict as a pandas DataFrame.
         """
+        import pandas as pd
+
         return pd.read_csv(StringIO(self.to_csv()))
 
+    def with_base(self, base):
+        """Copy the table, encoding the state ids with a different base.
+
+        Arguments:
+            base: the base of the copy.
+
+        Returns: the copy of the table.
+        """
+        result = ObservationDict(self.init_value, self.n_actions, self.bucketer, base=base, n_dims=self.n_dims,
+                                 capacity=max(self.n_rows, 1), dtype=self.values.dtype)
+
+        for key, values in self.items():
+            result[key][:] = values
+
+        return result
+
+    def __setstate__(self, state):
+        if 'table' not in state:
+            self.__dict__.update(state)
+
+            if 'max_value' not in state:
+                self._set_max_value()
+
+            return
+
+        # Tables saved before the values were stored in an array are nested dictionaries with an array at each leaf.
+        self.__init__(state['init_value'], state['n_actions'], state['bucketer'])
+
+        def walk(cell, key):
+            if isinstance(cell, dict):
+                for k in cell:
+                    yield from walk(cell[k], key + (k,))
+            else:
+                yield key, cell
+
+        for key, values in walk(state['table'], ()):
+            self[key][:] = values
+
     def __str__(self):
         return '\n'.join(map(lambda row: str(row), self.flatten()))
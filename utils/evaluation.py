@@ -0,0 +1,162 @@
+from datetime import datetime
+import glob
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from utils.checkpoint import apply_delta, load_checkpoint, parse_checkpoint_path
+from utils.policy import GreedyPolicy
+
+EVALUATION_COLUMNS = 'checkpoint,episode,mean,std,min,max'
+
+def evaluate(policy, env, n_episodes=10, max_timesteps=200):
+    """Run a policy for a number of episodes, without exploration, rendering or learning.
+
+    Arguments:
+        policy: the GreedyPolicy to evaluate.
+        env: the OpenAI Gym environment to evaluate the policy in.
+        n_episodes: the number of episodes to run.
+        max_timesteps: the maximum number of timesteps in an episode.
+
+    Returns: an array with the number of timesteps of each episode.
+    """
+    timesteps = np.zeros(n_episodes, dtype=int)
+
+    for i_episode in range(n_episodes):
+        observation = env.reset()
+
+        for t in range(max_timesteps):
+            observation, reward, done, info = env.step(policy.get_action(observation))
+
+            if done:
+                break
+
+        timesteps[i_episode] = t + 1
+
+    return timesteps
+
+def evaluation_log_path(run_path, filename_prefix=''):
+    """Get the path of the evaluation log of a run, named like the logs written by Logger."""
+    if len(filename_prefix) > 0:
+        return '{}{}-evaluation.log'.format(run_path, filename_prefix)
+
+    return '{}evaluation.log'.format(run_path)
+
+def load_evaluation(run_path, filename_prefix=''):
+    """Load the evaluation log of a run.
+
+    Arguments:
+        run_path: the directory of the run.
+        filename_prefix: the prefix of the log files of the run, i.e. the model name.
+
+    Returns: the evaluation log as a pandas DataFrame, or None if the run does not have any evaluations yet.
+    """
+    import pandas as pd
+
+    path = evaluation_log_path(run_path, filename_prefix)
+
+    if not os.path.isfile(path):
+        return None
+
+    return pd.read_csv(path, comment='[')
+
+class EvaluationWorker:
+    """Evaluates the checkpoints of a run in a separate process while the run is training.
+
+    The worker watches the run directory for new '<prefix>-checkpoint-NNN.q' (or '.delta.npz', see DeltaCheckpointer)
+    files, runs greedy, headless episodes with each of them (see GreedyPolicy), and appends the results to the run's
+    evaluation log. Every checkpoint is evaluated on the same episodes (the environment is seeded the same way each time) so that the scores of
+    checkpoints can be compared with each other.
+    """
+    def __init__(self, run_path, filename_prefix='', checkpoint_rate=1, n_episodes=10, seed=None, poll_interval=0.5):
+        """Create a worker. The worker does not do anything until it is started.
+
+        Arguments:
+            run_path: the directory the checkpoints are saved in.
+            filename_prefix: the prefix of the checkpoint and log files, i.e. the model name.
+            checkpoint_rate: how often checkpoints are saved (in episodes). Used to log the episode of each checkpoint.
+            n_episodes: the number of episodes to evaluate each checkpoint with.
+            seed: the seed for the evaluation environment.
+            poll_interval: how often to check for new checkpoints (in seconds).
+        """
+        self.run_path = run_path
+        self.filename_prefix = filename_prefix
+        self.checkpoint_rate = checkpoint_rate
+        self.n_episodes = n_episodes
+        self.seed = seed
+        self.poll_interval = poll_interval
+        self.log_path = evaluation_log_path(run_path, filename_prefix)
+
+        # main.py is a script without a main guard, so the process is forked rather than spawned, which would run it again.
+        context = multiprocessing.get_context('fork')
+        self.stop_event = context.Event()
+        self.process = context.Process(target=self.run, daemon=True)
+
+    def start(self):
+        self.process.start()
+
+    def stop(self):
+        """Evaluate any checkpoints that have not been evaluated yet and wait for the worker to finish."""
+        self.stop_event.set()
+        self.process.join()
+
+    def find_checkpoints(self):
+        """Find the checkpoints of the run, both full and delta checkpoints (see DeltaCheckpointer).
+
+        Returns: a sorted list of (checkpoint number, path) pairs.
+        """
+        checkpoints = []
+
+        for path in glob.glob('{}{}-checkpoint-*'.format(self.run_path, self.filename_prefix)):
+            parsed = parse_checkpoint_path(path)
+
+            if parsed is not None:
+                checkpoints.append((parsed[1], path))
+
+        return sorted(checkpoints)
+
+    def run(self):
+        import gym
+
+        env = gym.make('CartPole-v0')
+        evaluated = set()
+        # The agent of the last checkpoint, so that the next delta checkpoint can be applied to it without replaying
+        # every delta since the full checkpoint.
+        agent, agent_checkpoint = None, None
+
+        with open(self.log_path, 'a') as f:
+            f.write('[{}]\n{}\n'.format(datetime.now(), EVALUATION_COLUMNS))
+
+        while True:
+            # Check for the stop signal before looking for checkpoints, so the last checkpoints are always evaluated.
+            stopping = self.stop_event.is_set()
+
+            for checkpoint, path in self.find_checkpoints():
+                if checkpoint in evaluated:
+                    continue
+
+                if self.seed is not None:
+                    env.seed(self.seed)
+
+                if agent is not None and agent_checkpoint == checkpoint - 1 and parse_checkpoint_path(path)[2]:
+                    agent = apply_delta(agent, path, rebuild_visitation=False)
+                else:
+                    agent = load_checkpoint(path)
+
+                agent_checkpoint = checkpoint
+                timesteps = evaluate(GreedyPolicy.from_agent(agent), env, self.n_episodes)
+                evaluated.add(checkpoint)
+
+                with open(self.log_path, 'a') as f:
+                    f.write('{:03d}, {}, {:.2f}, {:.2f}, {}, {}\n'.format(checkpoint, checkpoint * self.checkpoint_rate,
+                                                                    timesteps.mean(), timesteps.std(), timesteps.min(),
+                                                                    timesteps.max()))
+
+            if stopping:
+                break
+
+            time.sleep(self.poll_interval)
+
+        env.close()
@@ -1,8 +1,9 @@
 from io import StringIO
 import os
+import random
 from datetime import datetime
 
-import pandas as pd
+import numpy as np
 
 from utils.path import get_run_path
 
@@ -42,6 +43,8 @@ class Logger:
         self.filename_prefix = filename_prefix
         self.log_path = log_path
         self.logs = {}
+        self.policies = {}
+        self.i_episode = None
 
         self.print('Log directory: {}'.format(log_path), Logger.Verbosity.MINIMAL)
 
@@ -73,6 +76,49 @@ class Logger:
         except KeyError:
             self.logs[filename] = [str(contents)]
 
+    def set_policy(self, name, policy):
+        """Set how the values of a step series are logged (see StepLogPolicy). Series without a policy are logged in full.
+        A policy that is set during an episode starts with the current episode.
+
+        Arguments:
+            name: the name of the log file of the series, e.g. 'rewards'.
+            policy: the StepLogPolicy for the series.
+        """
+        self.policies[name] = policy
+
+        if self.i_episode is not None:
+            policy.start_episode(self, name, self.i_episode)
+
+    def start_episode(self, i_episode):
+        """Mark the start of an episode in the step series.
+
+        Arguments:
+            i_episode: the index of the episode.
+        """
+        self.i_episode = i_episode
+
+        for name, policy in self.policies.items():
+            policy.start_episode(self, name, i_episode)
+
+    def log_step(self, name, value):
+        """Add the value of a step to a step series, according to the series' policy.
+
+        Arguments:
+            name: the name of the log file of the series.
+            value: the value for this step.
+        """
+        if name not in self.policies:
+            self.set_policy(name, FullPolicy())
+
+        self.policies[name].log_step(self, name, value)
+
+    def end_episode(self):
+        """Mark the end of an episode in the step series."""
+        for name, policy in self.policies.items():
+            policy.end_episode(self, name)
+
+        self.i_episode = None
+
     def clear(self):
         """Clear the log.
 
@@ -91,6 +137,9 @@ class Logger:
             sep: the seperator to use to seperate each log entry of a file.
         """
         os.makedirs(self.log_path, exist_ok=True)
+
+        for name, policy in self.policies.items():
+            policy.flush(self, name)
         
         self.print('Writing logs to: {}'.format(self.log_path), Logger.Verbosity.MINIMAL)
 
@@ -120,4 +169,193 @@ class Logger:
 
         Returns: the specified log as a DataFrame.
         """
+        import pandas as pd
+
         return pd.read_csv(StringIO('\n'.join(self.logs[name])), comment='[')
+
+class StepLogPolicy:
+    """Interface for the policies that decide how the values of a step series (e.g. the reward of every step) are logged.
+
+    Logging every step is most of the volume of the logs, so long runs can instead log a sample of the steps or
+    statistics of each episode.
+    """
+    def start_episode(self, logger, name, i_episode):
+        """Called at the start of every episode.
+
+        Arguments:
+            logger: the Logger the series is logged to.
+            name: the name of the series.
+            i_episode: the index of the episode.
+        """
+        self.i_episode = i_episode
+        self.i_step = 0
+
+    def log_step(self, logger, name, value):
+        """Called with the value of every step.
+
+        Arguments:
+            logger: the Logger the series is logged to.
+            name: the name of the series.
+            value: the value of the step, either a number or an array.
+        """
+        raise NotImplementedError
+
+    def end_episode(self, logger, name):
+        """Called at the end of every episode."""
+        pass
+
+    def flush(self, logger, name):
+        """Called before the logs are written to file."""
+        pass
+
+class FullPolicy(StepLogPolicy):
+    """Logs the value of every step, with a '[Episode N]' line at the start of every episode."""
+    def start_episode(self, logger, name, i_episode):
+        logger.log(name, '[Episode {}]'.format(i_episode))
+
+    def log_step(self, logger, name, value):
+        logger.log(name, value)
+
+class EveryNthEpisodePolicy(StepLogPolicy):
+    """Logs every step of every n-th episode, like FullPolicy, and nothing for the other episodes."""
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError('The every-nth step log policy logs every n-th episode, so n must be at least 1, got {}.'.format(n))
+
+        self.n = n
+        self.active = False
+
+    def start_episode(self, logger, name, i_episode):
+        self.active = i_episode % self.n == 0
+
+        if self.active:
+            logger.log(name, '[Episode {}]'.format(i_episode))
+
+    def log_step(self, logger, name, value):
+        if self.active:
+            logger.log(name, value)
+
+class ReservoirPolicy(StepLogPolicy):
+    """Logs a uniform random sample of the steps (reservoir sampling).
+
+    The sample holds up to k steps out of all of the steps since the logs were last written, and is logged as
+    'episode,step,value' rows, in order, when the logs are written. The sample uses its own random number generator, so
+    it does not change the random numbers seen by the rest of the program.
+    """
+    def __init__(self, k, seed=None):
+        """
+        Arguments:
+            k: the maximum number of steps to log each time the logs are written.
+            seed: the seed for the sampling.
+        """
+        if k < 1:
+            raise ValueError('The reservoir step log policy needs a sample size of at least 1, got {}.'.format(k))
+
+        self.k = k
+        self.random = random.Random(seed)
+        self.i_episode = 0
+        self.i_step = 0
+        self.sample = []
+        self.n_seen = 0
+        self.header_logged = False
+
+    def log_step(self, logger, name, value):
+        self.n_seen += 1
+
+        if len(self.sample) < self.k:
+            self.sample.append((self.i_episode, self.i_step, value))
+        else:
+            i = self.random.randrange(self.n_seen)
+
+            if i < self.k:
+                self.sample[i] = (self.i_episode, self.i_step, value)
+
+        self.i_step += 1
+
+    def flush(self, logger, name):
+        if not self.header_logged:
+            logger.log(name, 'episode,step,value')
+            self.header_logged = True
+
+        for i_episode, i_step, value in sorted(self.sample, key=lambda row: row[:2]):
+            logger.log(name, '{}, {}, {}'.format(i_episode, i_step, value))
+
+        self.sample = []
+        self.n_seen = 0
+
+class EpisodeAggregatePolicy(StepLogPolicy):
+    """Logs the sum, mean, min and max of the values of each episode, computed as the steps are logged.
+
+    Rows are 'episode,steps,sum,mean,min,max'. For arrays (e.g. observations) the statistics are computed for each
+    element and there is a column for each, e.g. 'sum_0,sum_1,...'.
+    """
+    STATISTICS = ['sum', 'mean', 'min', 'max']
+
+    def __init__(self):
+        self.header_logged = False
+        self.i_episode = 0
+        self.i_step = 0
+        self.sum = None
+
+    def start_episode(self, logger, name, i_episode):
+        super().start_episode(logger, name, i_episode)
+        self.sum = None
+
+    def log_step(self, logger, name, value):
+        if self.sum is None:
+            if np.ndim(value) > 0:
+                self.sum = np.array(value, dtype=np.float64)
+                self.min = self.sum.copy()
+                self.max = self.sum.copy()
+            else:
+                self.sum = self.min = self.max = float(value)
+        elif isinstance(self.sum, np.ndarray):
+            np.add(self.sum, value, out=self.sum)
+            np.minimum(self.min, value, out=self.min)
+            np.maximum(self.max, value, out=self.max)
+        else:
+            self.sum += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+
+        self.i_step += 1
+
+    def end_episode(self, logger, name):
+        if self.sum is None:
+            return
+
+        columns = [np.ravel(self.sum), np.ravel(self.sum) / self.i_step, np.ravel(self.min), np.ravel(self.max)]
+
+        if not self.header_logged:
+            if isinstance(self.sum, np.ndarray):
+                names = ['{}_{}'.format(statistic, i) for statistic in self.STATISTICS for i in range(len(columns[0]))]
+            else:
+                names = self.STATISTICS
+
+            logger.log(name, ','.join(['episode', 'steps'] + names))
+            self.header_logged = True
+
+        logger.log(name, ', '.join([str(self.i_episode), str(self.i_step)] + ['{:.6g}'.format(value) for column in columns for value in column]))
+        self.sum = None
+
+def make_step_log_policy(name, every_n=10, reservoir_size=1000, seed=None):
+    """Create a step log policy from its name.
+
+    Arguments:
+        name: one of 'full', 'every-nth', 'reservoir' or 'aggregate'.
+        every_n: the n of the 'every-nth' policy.
+        reservoir_size: the size of the sample of the 'reservoir' policy.
+        seed: the seed of the 'reservoir' policy.
+
+    Returns: the StepLogPolicy.
+    """
+    if name == 'full':
+        return FullPolicy()
+    elif name == 'every-nth':
+        return EveryNthEpisodePolicy(every_n)
+    elif name == 'reservoir':
+        return ReservoirPolicy(reservoir_size, seed)
+    elif name == 'aggregate':
+        return EpisodeAggregatePolicy()
+
+    raise ValueError('Unknown step log policy: {}'.format(name))
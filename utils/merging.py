@@ -0,0 +1,213 @@
+import copy
+import glob
+import os
+import pickle
+import time
+
+import numpy as np
+
+from utils.datastructures import ObservationDict
+from utils.path import write_atomic
+from utils.visitation import VisitationStats
+
+def _check_compatible(agent, reference):
+    if (agent.bucketer.n_buckets != reference.bucketer.n_buckets or agent.bucketer.boundaries != reference.bucketer.boundaries
+            or not np.array_equal(agent.input_mask, reference.input_mask) or len(agent.actions) != len(reference.actions)):
+        raise ValueError('Only agents with the same bucketing, input mask and actions can be merged.')
+
+def _gather(table, state_ids):
+    """Get the values of a table for a sorted array of state ids as a dense array."""
+    values = np.full((len(state_ids), table.n_actions), table.init_value, dtype=float)
+    values[np.searchsorted(state_ids, table.state_ids[:table.n_rows])] = table.values[:table.n_rows]
+
+    return values
+
+def merge_agents(agents, base=None):
+    """Merge the Q-tables of agents that were trained independently into a single agent.
+
+    The Q-value of each state-action pair is the average of the agents' Q-values, weighted by how many times each agent
+    chose that action in that state:
+
+        Q(s, a) = Σ N_i(s, a) × Q_i(s, a) / Σ N_i(s, a)
+
+    and the action counts of the merged agent are the sum of the agents' action counts, so an agent that has never seen
+    a state does not dilute the Q-values of an agent that has.
+
+    If the agents all started from the same agent (e.g. the result of the previous merge), that agent should be passed
+    as base: the weights are then the counts since the base, and the shared counts are only counted once. State-action
+    pairs that no agent chose since the base keep the base's Q-value.
+
+    Arguments:
+        agents: the CartPoleAgents to merge. They must all have the same bucketing, input mask and actions.
+        base: the CartPoleAgent the agents started from, if any.
+
+    Returns: a new CartPoleAgent with the merged Q-table, action counts and visitation statistics. Everything else is
+             copied from base, or the first agent if there is no base.
+    """
+    reference = base if base is not None else agents[0]
+
+    for agent in agents:
+        _check_compatible(agent, reference)
+
+    tables = [table for agent in agents + ([base] if base is not None else []) for table in (agent.q_table, agent.action_counts)]
+    state_ids = np.unique(np.concatenate([table.state_ids[:table.n_rows] for table in tables]))
+
+    base_counts = _gather(base.action_counts, state_ids) if base is not None else 0
+    weights = [np.maximum(_gather(agent.action_counts, state_ids) - base_counts, 0) for agent in agents]
+    q_values = [_gather(agent.q_table, state_ids) for agent in agents]
+
+    total_weight = np.sum(weights, axis=0)
+    weighted_q = np.sum([w * q for w, q in zip(weights, q_values)], axis=0)
+    default_q = _gather(base.q_table, state_ids) if base is not None else np.mean(q_values, axis=0)
+
+    merged = copy.deepcopy(reference)
+    merged.model_path = None
+    merged.q_table = ObservationDict(reference.q_table.init_value, len(reference.actions), base=reference.bucketer.key_base,
+                                     n_dims=reference.bucketer.n, capacity=max(len(state_ids), 1),
+                                     dtype=reference.q_table.values.dtype)
+    merged.action_counts = ObservationDict(reference.action_counts.init_value, len(reference.actions),
+                                           base=reference.bucketer.key_base, n_dims=reference.bucketer.n,
+                                           capacity=max(len(state_ids), 1), dtype=reference.action_counts.values.dtype)
+
+    values, rows = merged.q_table.lookup_array(state_ids)
+    values[rows] = np.where(total_weight > 0, weighted_q / np.maximum(total_weight, 1), default_q)
+    values, rows = merged.action_counts.lookup_array(state_ids)
+    values[rows] = merged.action_counts.saturate(base_counts + total_weight)
+
+    merged.visitation = VisitationStats(merged.bucketer.n, merged.bucketer.n_buckets, table=merged.q_table)
+
+    for state_id, n_visits in zip(state_ids.tolist(), (base_counts + total_weight).sum(axis=1).tolist()):
+        if n_visits > 0:
+            merged.visitation.visit(state_id, int(n_visits), buckets=merged.q_table.decode(state_id))
+
+    return merged
+
+def dump(agent, path):
+    """Save an agent so that other processes never see a partially written file.
+
+    Arguments:
+        agent: the agent to save.
+        path: the path of the file.
+    """
+    write_atomic(path, pickle.dumps(agent))
+
+class SyncDirectory:
+    """A directory on a (possibly shared) filesystem that workers and a coordinator use to merge agents in rounds.
+
+    Each round every worker submits its agent, the coordinator merges them (see merge_agents()) and publishes the
+    result, and every worker continues training from the merged agent. For example, with two workers:
+    sync/round-000
+    \t\t|- worker-000.q
+    \t\t|- worker-001.q
+    \t\t|- merged.q
+    """
+    MERGED_FILENAME = 'merged.q'
+
+    def __init__(self, path, poll_interval=0.5):
+        """Use a directory for syncing.
+
+        Arguments:
+            path: the path of the directory. It is created if it does not exist.
+            poll_interval: how often to check for new files while waiting (in seconds).
+        """
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.poll_interval = poll_interval
+
+    def round_path(self, i_round):
+        path = os.path.join(self.path, 'round-{:03d}'.format(i_round))
+        os.makedirs(path, exist_ok=True)
+
+        return path
+
+    def submit(self, agent, i_round, worker_id):
+        """Submit a worker's agent for a round.
+
+        Arguments:
+            agent: the worker's agent.
+            i_round: the index of the round.
+            worker_id: the id of the worker.
+        """
+        dump(agent, os.path.join(self.round_path(i_round), 'worker-{:03d}.q'.format(worker_id)))
+
+    def wait_for_workers(self, i_round, n_workers, timeout=None):
+        """Wait until the workers have submitted their agents for a round.
+
+        Arguments:
+            i_round: the index of the round.
+            n_workers: the number of workers.
+            timeout: the maximum time to wait (in seconds). After the timeout the agents that were submitted so far are
+                     used. Defaults to None, i.e. wait for all of the workers.
+
+        Returns: the paths of the submitted agents.
+        """
+        pattern = os.path.join(self.round_path(i_round), 'worker-*.q')
+        start = time.time()
+
+        while True:
+            paths = sorted(glob.glob(pattern))
+
+            if len(paths) >= n_workers or (timeout is not None and time.time() - start > timeout and len(paths) > 0):
+                return paths
+
+            time.sleep(self.poll_interval)
+
+    def publish(self, agent, i_round):
+        """Publish the merged agent of a round.
+
+        Arguments:
+            agent: the merged agent.
+            i_round: the index of the round.
+        """
+        dump(agent, os.path.join(self.round_path(i_round), SyncDirectory.MERGED_FILENAME))
+
+    def load_merged(self, i_round):
+        """Load the merged agent of a round.
+
+        Arguments:
+            i_round: the index of the round.
+
+        Returns: the merged agent, or None if it has not been published.
+        """
+        path = os.path.join(self.path, 'round-{:03d}'.format(i_round), SyncDirectory.MERGED_FILENAME)
+
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def wait_for_merged(self, i_round):
+        """Wait until the merged agent of a round has been published.
+
+        Arguments:
+            i_round: the index of the round.
+
+        Returns: the merged agent.
+        """
+        while True:
+            merged = self.load_merged(i_round)
+
+            if merged is not None:
+                return merged
+
+            time.sleep(self.poll_interval)
+
+    def sync(self, agent, i_round, worker_id):
+        """Submit a worker's agent for a round and replace its Q-table with the merged Q-table.
+
+        Only the Q-table, action counts and visitation statistics are replaced, everything else about the worker's agent
+        (e.g. its annealing schedules) is kept.
+
+        Arguments:
+            agent: the worker's agent.
+            i_round: the index of the round.
+            worker_id: the id of the worker.
+        """
+        self.submit(agent, i_round, worker_id)
+        merged = self.wait_for_merged(i_round)
+
+        agent.q_table = merged.q_table
+        agent.action_counts = merged.action_counts
+        agent.visitation = merged.visitation
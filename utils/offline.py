@@ -0,0 +1,173 @@
+import numpy as np
+
+def iter_chunks(reader, chunk_size=65536):
+    """Iterate over the recorded transitions in chunks of whole episodes.
+
+    Only one chunk is read into memory at a time, so recordings that do not fit in memory can be processed.
+
+    Arguments:
+        reader: the TrajectoryReader of the recording.
+        chunk_size: the maximum number of transitions in a chunk. A chunk always has at least one episode, so chunks can
+                    be larger if an episode is longer than this.
+
+    Yields: (transitions, lengths) pairs where transitions is a structured array of the transitions of the chunk and
+            lengths is an array with the number of transitions of each episode in the chunk.
+    """
+    episodes = np.array(reader.episodes)
+    ends = episodes['start'] + episodes['length']
+    i = 0
+
+    while i < len(episodes):
+        start = episodes['start'][i]
+        j = max(int(np.searchsorted(ends, start + chunk_size, side='right')), i + 1)
+
+        yield np.array(reader.transitions[start:ends[j - 1]]), episodes['length'][i:j]
+
+        i = j
+
+def cumulative_rewards(rewards, lengths):
+    """Compute the cumulative reward of each step of a sequence of episodes.
+
+    main.py trains the agent with the reward accumulated so far in the episode rather than the reward of the step, so
+    this turns recorded step rewards into the rewards main.py would have used.
+
+    Arguments:
+        rewards: the reward of each step.
+        lengths: the number of steps in each episode. Must add up to the number of rewards.
+
+    Returns: an array with the sum of the rewards of the episode up to and including each step.
+    """
+    lengths = lengths[lengths > 0]
+    totals = np.cumsum(rewards, dtype=np.float64)
+    starts = np.cumsum(lengths) - lengths
+
+    return totals - np.repeat(totals[starts] - rewards[starts], lengths)
+
+class TransitionModel:
+    """A tabular model of the recorded transitions of an agent, in the bucketed state space.
+
+    Transitions are identified by rows of the agent's Q-table. Recorded transitions are aggregated by (state, action)
+    and (state, action, next state), so the size of the model depends on the number of states that were visited rather
+    than the number of transitions.
+    """
+    def __init__(self, agent):
+        """Create an empty model.
+
+        Arguments:
+            agent: the CartPoleAgent whose Q-table is used to find the rows of states.
+        """
+        self.agent = agent
+        self.n_actions = len(agent.actions)
+        # Aggregated (state, action, next state) keys, see _key(), and the number of times each was recorded.
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        # Sum of the rewards and number of transitions for each (state * n_actions + action).
+        self.reward_sums = np.zeros(0)
+        self.action_counts = np.zeros(0, dtype=np.int64)
+
+    def _key(self, rows, actions, next_rows):
+        return (rows * self.n_actions + actions) << 32 | next_rows
+
+    def add(self, observations, actions, rewards, next_observations):
+        """Add a batch of recorded transitions to the model.
+
+        Arguments:
+            observations: a (n_transitions, n_inputs) array of the observations the actions were chosen for.
+            actions: an integer array of the actions that were taken.
+            rewards: an array of the rewards for taking the actions.
+            next_observations: a (n_transitions, n_inputs) array of the observations after taking the actions.
+        """
+        q_table = self.agent.q_table
+        _, rows = q_table.lookup_array(self.agent.state_ids(observations))
+        _, next_rows = q_table.lookup_array(self.agent.state_ids(next_observations))
+        actions = np.asarray(actions, dtype=np.int64)
+
+        keys, counts = np.unique(self._key(rows, actions, next_rows), return_counts=True)
+        keys, inverse = np.unique(np.concatenate((self.keys, keys)), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate((self.counts, counts)), minlength=len(keys)).astype(np.int64)
+        self.keys = keys
+
+        n_pairs = len(q_table) * self.n_actions
+        self.reward_sums = np.concatenate((self.reward_sums, np.zeros(n_pairs - len(self.reward_sums))))
+        self.action_counts = np.concatenate((self.action_counts, np.zeros(n_pairs - len(self.action_counts), dtype=np.int64)))
+        np.add.at(self.reward_sums, rows * self.n_actions + actions, rewards)
+        np.add.at(self.action_counts, rows * self.n_actions + actions, 1)
+
+    def add_recording(self, reader, chunk_size=65536, cumulative=True):
+        """Add all of the transitions of a recording to the model, one chunk at a time.
+
+        Arguments:
+            reader: the TrajectoryReader of the recording.
+            chunk_size: the maximum number of transitions to read into memory at once.
+            cumulative: whether to use the cumulative reward of the episode (like main.py) instead of the step reward.
+        """
+        for transitions, lengths in iter_chunks(reader, chunk_size):
+            rewards = transitions['reward'].astype(np.float64)
+
+            if cumulative:
+                rewards = cumulative_rewards(rewards, lengths)
+
+            self.add(transitions['observation'], transitions['action'], rewards, transitions['next_observation'])
+
+    def __len__(self):
+        return int(self.action_counts.sum())
+
+def batch_q_iteration(agent, model, max_sweeps=1000, tol=1e-6):
+    """Fit the agent's Q-table to the transition model with batch Q-iteration.
+
+    Each sweep sets every recorded (state, action) pair to the expected backup over all of its recorded transitions:
+
+        Q(s, a) ← mean(r) + γ × Σ P(s' | s, a) × max Q(s', a')
+
+    with one vectorized update for the whole table. Sweeps are repeated until no Q-value changes by more than tol.
+
+    The agent's action counts and visitation statistics are set to the recorded counts, so the agent explores like it
+    had seen the recorded transitions if it is trained further online.
+
+    Arguments:
+        agent: the CartPoleAgent to train. Must be the agent that the model was built with.
+        model: the TransitionModel of the recorded transitions.
+        max_sweeps: the maximum number of sweeps.
+        tol: the largest change to a Q-value for the Q-values to be considered converged.
+
+    Returns: the number of sweeps and the largest change to a Q-value in the last sweep.
+    """
+    pairs = np.flatnonzero(model.action_counts)
+    rows, actions = np.divmod(pairs, model.n_actions)
+    mean_rewards = model.reward_sums[pairs] / model.action_counts[pairs]
+
+    # Map the (state, action) of each aggregated transition to its index in pairs.
+    transition_pairs = np.searchsorted(pairs, model.keys >> 32)
+    next_rows = model.keys & 0xFFFFFFFF
+    probabilities = model.counts / model.action_counts[model.keys >> 32]
+
+    q = agent.q_table.values
+    g = agent.discount_factor
+    delta = 0.0
+    n_sweeps = 0
+
+    while n_sweeps < max_sweeps:
+        next_Q = q[next_rows].max(axis=1)
+        expected_next_Q = np.bincount(transition_pairs, weights=probabilities * next_Q, minlength=len(pairs))
+        targets = mean_rewards + g * expected_next_Q
+
+        delta = np.abs(targets - q[rows, actions]).max(initial=0.0)
+        q[rows, actions] = targets
+        n_sweeps += 1
+
+        if delta <= tol:
+            break
+
+    counts = agent.action_counts
+
+    for row, action, count in zip(rows.tolist(), actions.tolist(), model.action_counts[pairs].tolist()):
+        count_values, count_row = counts.lookup(int(agent.q_table.state_ids[row]))
+        count_values[count_row, action] = counts.saturate(int(count_values[count_row, action]) + count)
+
+    for state_id, row in agent.q_table.index.items():
+        n_visits = int(model.action_counts[row * model.n_actions:(row + 1) * model.n_actions].sum())
+
+        if n_visits > 0:
+            agent.visitation.visit(state_id, n_visits, buckets=agent.q_table.decode(state_id))
+
+    return n_sweeps, delta
@@ -2,35 +2,73 @@ import os
 import re
 from datetime import datetime
 
-def get_run_path(prefix=''):
-        """Generate a path string in the format 'prefix/yyyy/mm/dd/run/nnn/'.
+# The run paths allocated by this process, keyed by process id and prefix.
+_run_paths = {}
+
+def get_run_path(prefix='', new=False):
+        """Get a path string in the format 'prefix/yyyy/mm/dd/run/nnn/' for the current run.
+
+        The run directory is allocated the first time this is called in a process and the same path is returned from
+        then on, so that everything a process writes (logs, models) ends up in the same run directory.
+        Allocation creates the directory with an exclusive mkdir, so processes that start at the same time never
+        share a run number.
 
         Arguments:
             prefix: the path to prepend to the run path.
+            new: whether to allocate a new run directory instead of reusing the one already allocated by this process.
 
-        Returns: a path string in the format 'prefix/yyyy/mm/dd/run/nnn/' 
+        Returns: a path string in the format 'prefix/yyyy/mm/dd/run/nnn/'
                  where prefix is the parameter 'prefix', yyyy/mm/dd is the date, and nnn is the 3-digit zero-padded run number.
         """
         if len(prefix) > 0 and prefix[-1] != '/':
-            prefix = prefix + '/'    
-    
+            prefix = prefix + '/'
+
+        key = (os.getpid(), prefix)
+
+        if not new and key in _run_paths:
+            return _run_paths[key]
+
         now = datetime.now()
 
         path = prefix
         path += '/'.join(map(lambda x: '{:02d}'.format(x), [now.year, now.month, now.day]))
         path += '/run'
 
-        if not os.path.isdir(path):
-            path += '/001'
-        else:
-            run_number = 1
-            pattern = re.compile("[0-9]{3}")
+        os.makedirs(path, exist_ok=True)
+
+        run_number = 1
+        pattern = re.compile("[0-9]{3}")
+
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir() and re.match(pattern, entry.name):
+                    run_number = max(run_number, int(entry.name) + 1)
+
+        while True:
+            try:
+                os.mkdir('{}/{:03d}'.format(path, run_number))
+                break
+            except FileExistsError:
+                # Another process took this run number since the directory was scanned.
+                run_number += 1
+
+        path += '/{:03d}/'.format(run_number)
+        _run_paths[key] = path
+
+        return path
+
+def write_atomic(path, data):
+    """Write bytes to a file so that other processes never see a partially written file.
+
+    The data is written to a temporary file next to path, which is then renamed to path.
 
-            with os.scandir(path) as it:
-                for entry in it:
-                    if entry.is_dir() and re.match(pattern, entry.name):
-                        run_number = max(run_number, int(entry.name) + 1)
+    Arguments:
+        path: the path of the file.
+        data: the bytes to write.
+    """
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
 
-            path += '/{:03d}'.format(run_number)
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
 
-        return path + '/'
+    os.replace(tmp_path, path)
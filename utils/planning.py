@@ -0,0 +1,168 @@
+import heapq
+
+import numpy as np
+
+class DynaPlanner:
+    """Model-based planning for a CartPoleAgent in the style of Dyna-Q with prioritized sweeping.
+
+    The planner learns a tabular model of the environment in the bucketed state space from the real transitions the
+    agent experiences: for each state and action it remembers the last state it led to and the mean reward. States are
+    identified by their row in the agent's Q-table, so the model is a set of arrays parallel to the Q-table.
+    Between real steps it uses the model to perform extra (simulated) Q-value backups on the agent's Q-table.
+
+    Rather than picking the simulated transitions at random, the state-action pairs whose Q-values are expected to
+    change the most (i.e. have the largest TD error) are backed up first, and backing up a state puts the states that
+    lead to it back in the queue (prioritized sweeping). Backups are done in batches of up to n_steps state-action
+    pairs that are updated together.
+
+    Each state-action pair is queued at most once, with the highest priority it was queued with. Raising the priority
+    of a queued pair leaves a stale entry in the heap, which is skipped when it is popped, and the heap is rebuilt
+    when stale entries make up most of it, so the size of the queue is bounded by the size of the model.
+    """
+    def __init__(self, agent, n_steps=10, priority_threshold=1e-4, capacity=1024):
+        """Create a planner for an agent.
+
+        Arguments:
+            agent: the CartPoleAgent whose Q-table should be updated.
+            n_steps: the maximum number of simulated backups to do each time plan() is called.
+            priority_threshold: the minimum TD error for a state-action pair to be queued for a backup.
+            capacity: the number of states the model initially has room for. The model grows as needed.
+        """
+        self.agent = agent
+        self.n_steps = n_steps
+        self.priority_threshold = priority_threshold
+
+        n_actions = len(agent.actions)
+
+        self.predecessors = []
+        self.next_states = np.full((capacity, n_actions), -1, dtype=np.int64)
+        self.rewards = np.zeros((capacity, n_actions))
+        self.counts = np.zeros((capacity, n_actions), dtype=np.int64)
+        # The priority each state-action pair is queued with, or 0 if it is not queued.
+        self.priorities = np.zeros((capacity, n_actions))
+        self.n_queued = 0
+        self.queue = []
+
+    def get_state(self, observation):
+        """Find the state for an observation, adding the state to the model if it is new.
+
+        Arguments:
+            observation: a set of observation values from the environment.
+
+        Returns: the row of the state in the agent's Q-table.
+        """
+        _, row = self.agent.q_table.lookup(self.agent.state_id(observation))
+
+        while row >= len(self.next_states):
+            self._grow()
+
+        while row >= len(self.predecessors):
+            self.predecessors.append(set())
+
+        return row
+
+    def _grow(self):
+        capacity, n_actions = self.next_states.shape
+
+        self.next_states = np.concatenate((self.next_states, np.full((capacity, n_actions), -1, dtype=np.int64)))
+        self.rewards = np.concatenate((self.rewards, np.zeros((capacity, n_actions))))
+        self.counts = np.concatenate((self.counts, np.zeros((capacity, n_actions), dtype=np.int64)))
+        self.priorities = np.concatenate((self.priorities, np.zeros((capacity, n_actions))))
+
+    def observe(self, prev_observation, prev_action, reward, observation):
+        """Add a real transition to the model and queue it for a backup.
+
+        Arguments:
+            prev_observation: the set of observation values from the previous step.
+            prev_action: the action taken last step.
+            reward: the reward from taking the previous action.
+            observation: the set of observation values for the next step.
+        """
+        state = self.get_state(prev_observation)
+        next_state = self.get_state(observation)
+
+        prev_next_state = self.next_states[state, prev_action]
+
+        if prev_next_state not in (-1, next_state):
+            self.predecessors[prev_next_state].discard((state, prev_action))
+
+        self.next_states[state, prev_action] = next_state
+        self.counts[state, prev_action] += 1
+        self.rewards[state, prev_action] += (reward - self.rewards[state, prev_action]) / self.counts[state, prev_action]
+        self.predecessors[next_state].add((state, prev_action))
+
+        self._push(state, prev_action)
+
+    def _td_error(self, state, action):
+        q = self.agent.q_table.values
+        next_Q = q[self.next_states[state, action]].max()
+        target = self.rewards[state, action] + self.agent.discount_factor * next_Q
+
+        return target - q[state, action]
+
+    def _push(self, state, action):
+        priority = abs(self._td_error(state, action))
+        queued_priority = self.priorities[state, action]
+
+        if priority <= self.priority_threshold or priority <= queued_priority:
+            return
+
+        if queued_priority == 0:
+            self.n_queued += 1
+
+        self.priorities[state, action] = priority
+        heapq.heappush(self.queue, (-priority, state, action))
+
+        if len(self.queue) > 2 * self.n_queued + 64:
+            self._compact()
+
+    def _compact(self):
+        """Rebuild the heap from the queued priorities, dropping the stale entries."""
+        states, actions = np.nonzero(self.priorities)
+        self.queue = [(-priority, state, action) for priority, state, action
+                      in zip(self.priorities[states, actions].tolist(), states.tolist(), actions.tolist())]
+        heapq.heapify(self.queue)
+
+    def plan(self, t=0):
+        """Do up to n_steps simulated backups with the model, highest priority first.
+
+        Arguments:
+            t: the timestep used for annealing the learning rate.
+
+        Returns: the number of backups that were done.
+        """
+        batch = []
+
+        while self.queue and len(batch) < self.n_steps:
+            priority, state, action = heapq.heappop(self.queue)
+
+            if -priority != self.priorities[state, action]:
+                continue  # stale, the pair was queued again with a higher priority (or already backed up).
+
+            self.priorities[state, action] = 0
+            self.n_queued -= 1
+            batch.append((state, action))
+
+        if not batch:
+            return 0
+
+        states, actions = (np.array(column) for column in zip(*batch))
+        next_states = self.next_states[states, actions]
+
+        values = self.agent.q_table.values
+        q = values[states, actions]
+        next_Q = values[next_states].max(axis=1)
+
+        if self.agent.learning_rate_annealing:
+            a = self.agent.learning_rate_annealing(self.agent.learning_rate, t)
+        else:
+            a = self.agent.learning_rate
+
+        g = self.agent.discount_factor
+        values[states, actions] = (1 - a) * q + a * (self.rewards[states, actions] + g * next_Q)
+
+        for state in set(states.tolist()):
+            for predecessor, action in self.predecessors[state]:
+                self._push(predecessor, action)
+
+        return len(batch)
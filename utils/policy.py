@@ -0,0 +1,109 @@
+import numpy as np
+
+from utils.bucketing import MultiBucketer
+
+class GreedyPolicy:
+    """A compact, read-only greedy policy compiled from a CartPoleAgent.
+
+    The Q-table is compiled into a single int8 array that maps a state id to the action with the highest Q-value,
+    where the state id of a bucketed observation is its index in a dense table with n_buckets + 1 entries per
+    dimension (the last entry is for values outside of the bucketer's range). Unlike CartPoleAgent.get_action(),
+    choosing an action does not change anything, involves no exploration bonus, and can be done for a whole batch of
+    observations at once.
+    """
+    def __init__(self, actions, lower_bounds, upper_bounds, n_buckets, input_mask):
+        """Create a policy from a compiled action table.
+
+        Arguments:
+            actions: an int8 array with the greedy action for each state id.
+            lower_bounds: the lower bounds of the values of the observation that are not masked.
+            upper_bounds: the upper bounds of the values of the observation that are not masked.
+            n_buckets: how many buckets the observation space is separated into.
+            input_mask: the agent's input mask.
+        """
+        self.actions = actions
+        self.lower_bounds = np.asarray(lower_bounds)
+        self.upper_bounds = np.asarray(upper_bounds)
+        self.n_buckets = n_buckets
+        self.input_mask = np.asarray(input_mask)
+        self.active_dims = np.flatnonzero(self.input_mask)
+        self.bucketer = MultiBucketer(self.lower_bounds, self.upper_bounds, n_buckets)
+        self.shape = (n_buckets + 1,) * self.bucketer.n
+
+    @staticmethod
+    def from_agent(agent):
+        """Compile the greedy policy of an agent.
+
+        States that the agent has never seen get the action the agent would pick for them, i.e. the first action since
+        all of their Q-values are equal.
+
+        Arguments:
+            agent: the CartPoleAgent to compile.
+
+        Returns: the agent's greedy policy.
+        """
+        bucketer = agent.bucketer
+        lower_bounds = [b.lower_bound for b in bucketer.bucketers]
+        upper_bounds = [b.upper_bound for b in bucketer.bucketers]
+        actions = np.zeros((bucketer.n_buckets + 1) ** bucketer.n, dtype=np.int8)
+
+        keys, q_values = agent.q_table.to_arrays()
+
+        if len(keys) > 0:
+            state_ids = np.ravel_multi_index(tuple((keys % (bucketer.n_buckets + 1)).T), (bucketer.n_buckets + 1,) * bucketer.n)
+            actions[state_ids] = q_values.argmax(axis=1)
+
+        return GreedyPolicy(actions, lower_bounds, upper_bounds, bucketer.n_buckets, agent.input_mask)
+
+    def state_ids(self, observations):
+        """Find the state ids of a batch of observations.
+
+        Arguments:
+            observations: a (n_observations, n_inputs) array of observations.
+
+        Returns: an array with the state id of each observation.
+        """
+        bucketed = self.bucketer.get_bucketed_array(np.asarray(observations)[:, self.active_dims])
+
+        return np.ravel_multi_index(tuple((bucketed % (self.n_buckets + 1)).T), self.shape)
+
+    def __call__(self, observations):
+        """Choose the greedy action for a batch of observations.
+
+        Arguments:
+            observations: a (n_observations, n_inputs) array of observations.
+
+        Returns: an int8 array with the action for each observation.
+        """
+        return self.actions[self.state_ids(observations)]
+
+    def get_action(self, observation):
+        """Choose the greedy action for a single observation.
+
+        Arguments:
+            observation: a set of observation values from the environment.
+
+        Returns: the greedy action (integer).
+        """
+        return int(self(np.asarray(observation)[np.newaxis])[0])
+
+    def save(self, path):
+        """Save the policy to file.
+
+        Arguments:
+            path: the path of the file, usually ending in '.npz'.
+        """
+        np.savez(path, actions=self.actions, lower_bounds=self.lower_bounds, upper_bounds=self.upper_bounds,
+                 n_buckets=self.n_buckets, input_mask=self.input_mask)
+
+    @staticmethod
+    def load(path):
+        """Load a saved policy.
+
+        Arguments:
+            path: the path of the saved policy.
+
+        Returns: the saved policy.
+        """
+        with np.load(path) as f:
+            return GreedyPolicy(f['actions'], f['lower_bounds'], f['upper_bounds'], int(f['n_buckets']), f['input_mask'])
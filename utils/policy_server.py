@@ -0,0 +1,151 @@
+import asyncio
+import os
+import socket
+
+import numpy as np
+
+# Requests are the observation as little-endian float32 values and responses are a single int8 action.
+OBSERVATION_DTYPE = np.dtype('<f4')
+
+def parse_address(address):
+    """Parse a server address.
+
+    Arguments:
+        address: either 'host:port' for a TCP socket, or the path of a Unix socket.
+
+    Returns: a (host, port) tuple for TCP sockets, or the path for Unix sockets.
+    """
+    host, sep, port = address.rpartition(':')
+
+    if sep and port.isdigit():
+        return host or 'localhost', int(port)
+
+    return address
+
+class PolicyServer:
+    """Serves the actions of a GreedyPolicy over a local socket.
+
+    Requests that arrive at about the same time are answered together with a single, vectorized call to the policy
+    (micro-batching): the first request that arrives schedules a flush of the pending requests for the next iteration
+    of the event loop, and every request that is read before then joins the same batch. No request ever waits for a
+    timer, so a lone request is answered as fast as possible while a busy server does less work per request.
+    """
+    def __init__(self, policy, address, max_batch_size=1024):
+        """Create a server for a policy.
+
+        Arguments:
+            policy: the GreedyPolicy to serve.
+            address: either 'host:port' for a TCP socket, or the path of a Unix socket.
+            max_batch_size: the maximum number of requests in a batch.
+        """
+        self.policy = policy
+        self.address = parse_address(address)
+        self.max_batch_size = max_batch_size
+        self.request_size = len(policy.input_mask) * OBSERVATION_DTYPE.itemsize
+        self.pending = []
+        self.flush_scheduled = False
+        self.n_batches = 0
+        self.n_requests = 0
+
+    async def handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+
+        if sock is not None and sock.family != socket.AF_UNIX:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            while True:
+                request = await reader.readexactly(self.request_size)
+                future = loop.create_future()
+                self.pending.append((request, future))
+
+                if len(self.pending) >= self.max_batch_size:
+                    self.flush()
+                elif not self.flush_scheduled:
+                    self.flush_scheduled = True
+                    loop.call_soon(self.flush)
+
+                writer.write(await future)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def flush(self):
+        """Answer all of the pending requests with a single call to the policy."""
+        self.flush_scheduled = False
+        pending, self.pending = self.pending, []
+
+        if not pending:
+            return
+
+        observations = np.frombuffer(b''.join(request for request, _ in pending), dtype=OBSERVATION_DTYPE)
+        actions = self.policy(observations.reshape(len(pending), -1)).astype(np.int8).tobytes()
+
+        for i, (_, future) in enumerate(pending):
+            if not future.cancelled():
+                future.set_result(actions[i:i + 1])
+
+        self.n_batches += 1
+        self.n_requests += len(pending)
+
+    async def serve(self):
+        """Serve requests until cancelled."""
+        if isinstance(self.address, tuple):
+            server = await asyncio.start_server(self.handle, *self.address)
+        else:
+            if os.path.exists(self.address):
+                os.remove(self.address)
+
+            server = await asyncio.start_unix_server(self.handle, self.address)
+
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """Serve requests until interrupted."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+class PolicyClient:
+    """A blocking client for a PolicyServer."""
+    def __init__(self, address, n_inputs=4):
+        """Connect to a policy server.
+
+        Arguments:
+            address: either 'host:port' for a TCP socket, or the path of a Unix socket.
+            n_inputs: the number of values in an observation.
+        """
+        address = parse_address(address)
+
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+
+        self.n_inputs = n_inputs
+
+    def get_action(self, observation):
+        """Ask the server for the action for an observation.
+
+        Arguments:
+            observation: a set of observation values from the environment.
+
+        Returns: the greedy action (integer).
+        """
+        self.sock.sendall(np.asarray(observation, dtype=OBSERVATION_DTYPE).tobytes())
+        response = self.sock.recv(1)
+
+        if not response:
+            raise ConnectionError('The policy server closed the connection.')
+
+        return int(np.frombuffer(response, dtype=np.int8)[0])
+
+    def close(self):
+        self.sock.close()
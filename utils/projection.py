@@ -0,0 +1,71 @@
+import numpy as np
+
+OBSERVATION_NAMES = ['cart position', 'cart velocity', 'pole angle', 'pole velocity']
+
+def project(keys, values, dims, n_buckets, reduce='max'):
+    """Project a sparse table onto a subset of its dimensions.
+
+    The values of all cells that share the same buckets in the chosen dimensions are reduced to a single value, e.g.
+    projecting onto the dimensions (2, 3) gives the best Q-value for each combination of pole angle and pole velocity.
+
+    Arguments:
+        keys: a (n_cells, n_dims) integer array of bucketed observations, as given by ObservationDict.to_arrays().
+        values: a (n_cells,) array with one value per cell.
+        dims: the indices of the dimensions to project onto.
+        n_buckets: the number of buckets per dimension.
+        reduce: how values that fall into the same cell of the projection are combined. One of 'max', 'mean' or 'sum'.
+
+    Returns: an array with n_buckets + 1 elements along each of the chosen dimensions. The last element along each
+             dimension holds the cells that were outside of the bucketer's range (bucket -1). Cells of the projection
+             that have no values are set to NaN.
+    """
+    shape = (n_buckets + 1,) * len(dims)
+    index = tuple(keys[:, dim] % (n_buckets + 1) for dim in dims)
+    counts = np.zeros(shape, dtype=int)
+    np.add.at(counts, index, 1)
+
+    if reduce == 'max':
+        result = np.full(shape, -np.inf)
+        np.maximum.at(result, index, values)
+    elif reduce in ('mean', 'sum'):
+        result = np.zeros(shape)
+        np.add.at(result, index, values)
+
+        if reduce == 'mean':
+            result[counts > 0] /= counts[counts > 0]
+    else:
+        raise ValueError('Unknown reduction \'{}\', expected one of \'max\', \'mean\' or \'sum\'.'.format(reduce))
+
+    result[counts == 0] = np.nan
+
+    return result
+
+def project_argmax(keys, values, dims, n_buckets):
+    """Project a sparse table of Q-values onto a subset of its dimensions, keeping the greedy action.
+
+    For each cell in the projection, the action with the highest Q-value among all of the cells that are projected onto
+    it is chosen.
+
+    Arguments:
+        keys: a (n_cells, n_dims) integer array of bucketed observations, as given by ObservationDict.to_arrays().
+        values: a (n_cells, n_actions) array of Q-values.
+        dims: the indices of the dimensions to project onto.
+        n_buckets: the number of buckets per dimension.
+
+    Returns: an array with n_buckets + 1 elements along each of the chosen dimensions holding the greedy action.
+             Cells of the projection that have no values are set to NaN.
+    """
+    shape = (n_buckets + 1,) * len(dims)
+    cells = np.ravel_multi_index(tuple(keys[:, dim] % (n_buckets + 1) for dim in dims), shape)
+    best_values = values.max(axis=1)
+    best_actions = values.argmax(axis=1)
+
+    # Sort by cell and then by value, so the last entry of each cell is the one with the highest value.
+    order = np.lexsort((best_values, cells))
+    cells = cells[order]
+    is_last = np.append(cells[1:] != cells[:-1], True)
+
+    result = np.full(int(np.prod(shape)), np.nan)
+    result[cells[is_last]] = best_actions[order][is_last]
+
+    return result.reshape(shape)
@@ -0,0 +1,132 @@
+from datetime import datetime
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows.
+    fcntl = None
+
+class RunIndex:
+    """An append-only index of the runs in a data directory.
+
+    Each line of the index file is a JSON record describing a change to a run, e.g. that it started (with its config
+    and paths) or that it finished. Later records for a run update the earlier ones, so the index never has to be
+    rewritten and processes can add to it concurrently.
+
+    Tools that need to find runs can read the index instead of walking the data directory.
+    """
+    class Status:
+        """Enum capturing the different states of a run."""
+        STARTED = 'started'
+        FINISHED = 'finished'
+
+    def __init__(self, root='data/', filename='runs.jsonl'):
+        """Open the index of a data directory.
+
+        Arguments:
+            root: the data directory the runs are stored in.
+            filename: the name of the index file inside the data directory.
+        """
+        self.root = root
+        self.path = os.path.join(root, filename)
+
+    def append(self, run_path, status, **fields):
+        """Add a record for a run to the index.
+
+        Arguments:
+            run_path: the path of the run directory, as given by get_run_path().
+            status: the status of the run. See RunIndex.Status
+            fields: any other JSON serialisable information about the run, e.g. its config.
+        """
+        record = dict(run=os.path.relpath(run_path, self.root), status=status, time=str(datetime.now()), pid=os.getpid())
+        record.update(fields)
+
+        os.makedirs(self.root, exist_ok=True)
+        line = (json.dumps(record, default=str) + '\n').encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+
+            os.write(fd, line)
+        finally:
+            os.close(fd)  # also releases the lock.
+
+    def runs(self):
+        """Read the index.
+
+        Returns: a dictionary mapping the path of each run directory to the latest information about the run, in the order
+                 the runs were added to the index.
+        """
+        runs = {}
+
+        if not os.path.isfile(self.path):
+            return runs
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a record that is still being written.
+
+                run_path = os.path.join(self.root, record['run'], '')
+                runs.setdefault(run_path, {}).update(record)
+
+        return runs
+
+    def start_date(self):
+        """Get the date the first run was added to the index.
+
+        Every run that main.py starts is added to the index, so runs in date directories (see get_run_path()) after this
+        date are all in the index.
+
+        Returns: the date, or None if the index is empty.
+        """
+        if not os.path.isfile(self.path):
+            return None
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    return datetime.strptime(json.loads(line)['time'][:10], '%Y-%m-%d').date()
+                except (ValueError, KeyError):
+                    continue
+
+        return None
+
+    @staticmethod
+    def open_for(path):
+        """Open the index of the data directory that a path is in, e.g. 'data/runs.jsonl' for 'data/2018/12/07/'.
+
+        Arguments:
+            path: a data directory or any directory inside it.
+
+        Returns: the RunIndex, or None if neither the directory nor any of its parents has an index.
+        """
+        path = os.path.abspath(path)
+
+        while True:
+            index = RunIndex(path)
+
+            if os.path.isfile(index.path):
+                return index
+
+            parent = os.path.dirname(path)
+
+            if parent == path:
+                return None
+
+            path = parent
+
+    def find(self, status=None):
+        """Find the runs in the index.
+
+        Arguments:
+            status: if set, only runs with this status are returned.
+
+        Returns: a list of the paths of the matching run directories.
+        """
+        return [run_path for run_path, record in self.runs().items() if status is None or record['status'] == status]
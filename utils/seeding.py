@@ -0,0 +1,75 @@
+import hashlib
+import random
+
+import numpy as np
+
+def seed_everything(seed, env=None):
+    """Seed every source of randomness used during training.
+
+    Arguments:
+        seed: the integer seed to use.
+        env: an optional OpenAI Gym environment that should also be seeded.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    if env is not None:
+        env.seed(seed)
+
+def derive_seed(seed, *keys):
+    """Derive a new seed from a base seed and a set of keys.
+
+    This is used to give worker processes their own, independent, but still reproducible streams of random numbers.
+    For example, derive_seed(42, 'worker', 3) always returns the same seed but is unrelated to derive_seed(42, 'worker', 4).
+
+    Arguments:
+        seed: the base seed. If None then None is returned so unseeded runs stay unseeded.
+        keys: any values that identify the consumer of the seed (e.g. a worker name and id).
+
+    Returns: a 32-bit integer seed, or None if seed is None.
+    """
+    if seed is None:
+        return None
+
+    digest = hashlib.sha1(repr((seed,) + keys).encode()).digest()
+
+    return int.from_bytes(digest[:4], 'little')
+
+class TrajectoryHasher:
+    """Computes a hash of the trajectories (observations, actions and rewards) seen during a run.
+
+    Two runs with the same settings and seed should produce identical hashes, so comparing the per-episode hashes of
+    two runs tells us if (and from which episode) the runs diverged.
+    """
+    def __init__(self):
+        self.run_hash = hashlib.sha1()
+        self.episode_hash = hashlib.sha1()
+
+    def update(self, observation, action, reward):
+        """Add a single step of a trajectory to the hash.
+
+        Arguments:
+            observation: the observation the environment returned after the action was taken.
+            action: the action that was taken.
+            reward: the reward that was received for the action.
+        """
+        self.episode_hash.update(np.asarray(observation, dtype=np.float64).tobytes())
+        self.episode_hash.update(np.asarray([action, reward], dtype=np.float64).tobytes())
+
+    def end_episode(self):
+        """Finish the hash for the current episode and start a new one.
+
+        Returns: the hex digest of the episode that just finished.
+        """
+        digest = self.episode_hash.hexdigest()
+        self.run_hash.update(digest.encode())
+        self.episode_hash = hashlib.sha1()
+
+        return digest
+
+    def hexdigest(self):
+        """Get the hash of all of the episodes finished so far.
+
+        Returns: the hex digest of the run.
+        """
+        return self.run_hash.hexdigest()
@@ -0,0 +1,199 @@
+import os
+import struct
+
+import numpy as np
+
+# The .npy headers are padded to a fixed size so that the shape can be rewritten in place as the arrays grow.
+HEADER_SIZE = 256
+
+EPISODE_DTYPE = np.dtype([('start', '<i8'), ('length', '<i8')])
+
+def transition_dtype(n_inputs=4):
+    """Get the record type of a single transition.
+
+    Arguments:
+        n_inputs: the number of values in an observation.
+
+    Returns: the numpy dtype of a transition record.
+    """
+    return np.dtype([('observation', '<f4', (n_inputs,)), ('action', 'i1'), ('reward', '<f4'),
+                     ('next_observation', '<f4', (n_inputs,)), ('done', '?')])
+
+def write_header(f, dtype, length):
+    """Write a fixed size .npy header for a one-dimensional array.
+
+    Arguments:
+        f: the file to write the header to, opened in binary mode. The header is written at the start of the file.
+        dtype: the dtype of the array.
+        length: the number of elements in the array.
+    """
+    magic = np.lib.format.magic(1, 0)
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (length,)})
+    n_padding = HEADER_SIZE - len(magic) - 2 - len(header) - 1
+
+    if n_padding < 0:
+        raise ValueError('The header for dtype {} does not fit in {} bytes.'.format(dtype, HEADER_SIZE))
+
+    f.seek(0)
+    f.write(magic + struct.pack('<H', HEADER_SIZE - len(magic) - 2) + (header + ' ' * n_padding + '\n').encode('latin1'))
+
+class MappedArray:
+    """A one-dimensional array, stored in a memory-mapped .npy file, that can be appended to.
+
+    The file is allocated in chunks that double in size, and the shape in the header only counts the elements that have
+    been flushed, so the file can be loaded with np.load() at any time.
+    """
+    def __init__(self, path, dtype, capacity=1024):
+        """Create an empty array.
+
+        Arguments:
+            path: the path of the .npy file. Any existing file is overwritten.
+            dtype: the dtype of the elements.
+            capacity: the number of elements to initially allocate space for.
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self.file = open(path, 'w+b')
+        write_header(self.file, self.dtype, 0)
+        self._map(capacity)
+
+    def _map(self, capacity):
+        self.file.truncate(HEADER_SIZE + capacity * self.dtype.itemsize)
+        self.array = np.memmap(self.file, dtype=self.dtype, mode='r+', offset=HEADER_SIZE, shape=(capacity,))
+
+    def append(self):
+        """Add an element to the end of the array.
+
+        Returns: the index of the new element. Set its fields through self.array.
+        """
+        if self.length == len(self.array):
+            self.array.flush()
+            self._map(2 * len(self.array))
+
+        self.length += 1
+
+        return self.length - 1
+
+    def flush(self):
+        """Write the elements to disk and update the length in the header."""
+        self.array.flush()
+        write_header(self.file, self.dtype, self.length)
+        self.file.flush()
+
+    def close(self):
+        """Flush the array and trim the unused space from the end of the file."""
+        self.flush()
+        del self.array
+        self.file.truncate(HEADER_SIZE + self.length * self.dtype.itemsize)
+        self.file.close()
+
+class TrajectoryRecorder:
+    """Records the transitions of a run as fixed size binary records.
+
+    The transitions are appended to a memory-mapped .npy file, and the start and length of each episode are kept in a
+    separate episode index, so any episode or range of steps can later be read without loading the whole run (see
+    TrajectoryReader). For example, a recorder for the directory 'data/2018/12/07/run/001/RoleyPoley-trajectory/'
+    produces:
+    data/2018/12/07/run/001/RoleyPoley-trajectory
+    \t\t\t\t\t\t\t|- transitions.npy
+    \t\t\t\t\t\t\t|- episodes.npy
+    """
+    def __init__(self, path, n_inputs=4, capacity=4096):
+        """Create a recorder.
+
+        Arguments:
+            path: the directory to record the trajectories to.
+            n_inputs: the number of values in an observation.
+            capacity: the number of transitions to initially allocate space for.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.transitions = MappedArray(os.path.join(path, 'transitions.npy'), transition_dtype(n_inputs), capacity)
+        self.episodes = MappedArray(os.path.join(path, 'episodes.npy'), EPISODE_DTYPE, 64)
+        self.episode_start = 0
+
+    def record(self, observation, action, reward, next_observation, done=False):
+        """Record a single transition.
+
+        Arguments:
+            observation: the set of observation values the action was chosen for.
+            action: the action that was taken.
+            reward: the reward for taking the action.
+            next_observation: the set of observation values after taking the action.
+            done: whether the episode ended after taking the action.
+        """
+        i = self.transitions.append()
+        record = self.transitions.array
+
+        record['observation'][i] = observation
+        record['action'][i] = action
+        record['reward'][i] = reward
+        record['next_observation'][i] = next_observation
+        record['done'][i] = done
+
+    def end_episode(self):
+        """Add the transitions recorded since the last call to the episode index."""
+        i = self.episodes.append()
+        self.episodes.array[i] = (self.episode_start, self.transitions.length - self.episode_start)
+        self.episode_start = self.transitions.length
+
+    def flush(self):
+        """Write the recorded transitions to disk, so that they can be read while the recording continues."""
+        self.transitions.flush()
+        self.episodes.flush()
+
+    def close(self):
+        self.transitions.close()
+        self.episodes.close()
+
+class TrajectoryReader:
+    """Reads the trajectories recorded by a TrajectoryRecorder.
+
+    The files are memory-mapped, so slicing episodes and steps does not copy or load any data until it is used.
+    Transitions are structured arrays with the fields 'observation', 'action', 'reward', 'next_observation' and 'done',
+    e.g. reader.episode(3)['reward'].sum() is the return of the fourth episode.
+    """
+    def __init__(self, path):
+        """Open a recording.
+
+        Arguments:
+            path: the directory the trajectories were recorded to.
+        """
+        self.path = path
+        self.transitions = np.load(os.path.join(path, 'transitions.npy'), mmap_mode='r')
+        self.episodes = np.load(os.path.join(path, 'episodes.npy'), mmap_mode='r')
+
+    def episode(self, i):
+        """Get the transitions of an episode.
+
+        Arguments:
+            i: the index of the episode.
+
+        Returns: a read-only view of the transitions of the episode.
+        """
+        start, length = self.episodes[i]
+
+        return self.transitions[start:start + length]
+
+    def steps(self, start, stop):
+        """Get a range of transitions, counting across episodes.
+
+        Arguments:
+            start: the index of the first transition.
+            stop: the index one past the last transition.
+
+        Returns: a read-only view of the transitions.
+        """
+        return self.transitions[start:stop]
+
+    def __getitem__(self, i):
+        return self.episode(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.episode(i)
+
+    def __len__(self):
+        return len(self.episodes)
@@ -0,0 +1,180 @@
+import numpy as np
+
+class VisitationStats:
+    """Keeps track of how often each bucketed state is visited.
+
+    The statistics are updated incrementally, one visit at a time, so they can be kept up to date during training and
+    queried at any time without scanning the Q-table:
+        - visit counts per state,
+        - a histogram of the visits for each dimension of the state (the marginals),
+        - the ratio of possible states that have been visited at least once (the coverage),
+        - the k most visited states in O(k).
+
+    The k most visited states are found with a linked list of frequency groups (in the style of an LFU cache).
+    Each group holds the states that have been visited exactly f times, and the groups are linked in increasing order
+    of f. A visit moves a state from its group f to the group f + 1, so visits are O(1), and the most visited states
+    can be read off from the tail of the list.
+
+    If a table is given, the states are kept by their integer state id (see ObservationDict.encode()) so that the agent
+    can record visits without creating any keys. States are still given to, and returned by, the public methods as
+    bucketed states.
+    """
+    def __init__(self, n_dims, n_buckets, table=None):
+        """Create an empty set of statistics.
+
+        Arguments:
+            n_dims: the number of dimensions of a state.
+            n_buckets: the number of buckets each dimension is split into.
+            table: the ObservationDict used to encode bucketed states as state ids and decode them again. Defaults to
+                   None, i.e. states are kept as tuples.
+        """
+        self.n_dims = n_dims
+        self.n_buckets = n_buckets
+        self.table = table
+        self.n_visits = 0
+        self.counts = {}
+        # Bucketers return -1 for values outside of their range, which ends up in the last column of the histogram.
+        self.marginals = np.zeros((n_dims, n_buckets + 1), dtype=np.int64)
+
+        # Frequency groups. Frequency 0 is a sentinel that is always present and never holds any states.
+        self.groups = {0: {}}
+        self.higher = {0: None}
+        self.lower = {0: None}
+        self.max_frequency = 0
+
+    def visit(self, state, n=1, buckets=None):
+        """Record a visit to a state.
+
+        Arguments:
+            state: the state that was visited, either as a bucketed state or as a state id.
+            n: the number of visits to record.
+            buckets: the bucketed state. Saves decoding the state id if the state is given as a state id.
+        """
+        state = self._key(state)
+
+        if buckets is None:
+            buckets = self._state(state)
+
+        frequency = self.counts.get(state, 0)
+        new_frequency = frequency + n
+
+        if new_frequency not in self.groups:
+            # Find the group the new group goes after. For single visits this is always the current group.
+            after = frequency
+
+            while self.higher[after] is not None and self.higher[after] < new_frequency:
+                after = self.higher[after]
+
+            self._insert_group(new_frequency, after=after)
+
+        self.groups[new_frequency][state] = None
+        self.counts[state] = new_frequency
+
+        if frequency > 0:
+            del self.groups[frequency][state]
+
+            if len(self.groups[frequency]) == 0:
+                self._remove_group(frequency)
+
+        for dim, bucket in enumerate(buckets):
+            self.marginals[dim, bucket] += n
+
+        self.n_visits += n
+
+    def _key(self, state):
+        if not isinstance(state, (list, tuple, np.ndarray)):
+            return state
+
+        return self.table.encode(state) if self.table is not None else tuple(state)
+
+    def _state(self, key):
+        return self.table.decode(key) if self.table is not None else key
+
+    def _insert_group(self, frequency, after):
+        next_frequency = self.higher[after]
+
+        self.groups[frequency] = {}
+        self.lower[frequency] = after
+        self.higher[frequency] = next_frequency
+        self.higher[after] = frequency
+
+        if next_frequency is None:
+            self.max_frequency = frequency
+        else:
+            self.lower[next_frequency] = frequency
+
+    def _remove_group(self, frequency):
+        prev_frequency = self.lower.pop(frequency)
+        next_frequency = self.higher.pop(frequency)
+        del self.groups[frequency]
+
+        self.higher[prev_frequency] = next_frequency
+
+        if next_frequency is None:
+            self.max_frequency = prev_frequency
+        else:
+            self.lower[next_frequency] = prev_frequency
+
+    def count(self, state):
+        """Get the number of times a state was visited.
+
+        Arguments:
+            state: the bucketed state, or its state id.
+
+        Returns: the number of visits to the state.
+        """
+        return self.counts.get(self._key(state), 0)
+
+    def hot_states(self, k=10):
+        """Get the k most visited states.
+
+        Arguments:
+            k: the number of states to return.
+
+        Returns: a list of up to k (bucketed state, count) pairs, sorted from most to least visited.
+        """
+        result = []
+        frequency = self.max_frequency
+
+        while frequency and len(result) < k:
+            for key in self.groups[frequency]:
+                result.append((self._state(key), frequency))
+
+                if len(result) == k:
+                    break
+
+            frequency = self.lower[frequency]
+
+        return result
+
+    def marginal(self, dim):
+        """Get the histogram of visits for a dimension of the state.
+
+        Arguments:
+            dim: the index of the dimension.
+
+        Returns: an array with the number of visits to each bucket of the dimension. The last element counts the values
+                 that fell outside of the range of the bucketer.
+        """
+        return self.marginals[dim].copy()
+
+    def coverage(self):
+        """Get the ratio of all possible states that have been visited at least once.
+
+        Returns: the number of visited states divided by the number of possible states.
+        """
+        return len(self.counts) / (self.n_buckets + 1) ** self.n_dims
+
+    def dim_coverage(self):
+        """Get, for each dimension, the ratio of its buckets that have been visited at least once.
+
+        Returns: an array with the coverage of each dimension.
+        """
+        return np.count_nonzero(self.marginals, axis=1) / (self.n_buckets + 1)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('table', None)
+
+    def __len__(self):
+        return len(self.counts)
@@ -25,19 +25,20 @@ class Dashboard:
 
         return result
 
-    def warmup(self, log_source, q_table: ObservationDict):
+    def warmup(self, log_source, q_table: ObservationDict, evaluation=None):
         # the plot needs to be drawn and updated at least 3 times to show for some reason..
-        self.draw(log_source, q_table)
+        self.draw(log_source, q_table, evaluation)
         
         plt.pause(1e-8)
         plt.pause(1e-8)
 
-    def draw(self, log_source, q_table: ObservationDict):
+    def draw(self, log_source, q_table: ObservationDict, evaluation=None):
         """Draw the dashboard with the given data.
         
         Arguments:
             q_table: the agent's Q-value table.
             log_source: either a Logger object used in training or  a tuple containing the dataframes for *episode_info.log, *learning_rate.log, and *exploration_rate.log.
+            evaluation: an optional dataframe of *evaluation.log (see EvaluationWorker), plotted over the episode info.
         """
         if self.was_closed:
             return
@@ -54,6 +55,9 @@ class Dashboard:
             ax1 = plt.subplot2grid(grid_shape, (0, 0), colspan=4, fig=self.fig)
             self.plot_file(episode_info, 'episode_info', ax1, n_cols=2, ylabel='timestep', ylim=[0, 200], moving_avg=True)
 
+            if evaluation is not None and len(evaluation) > 0:
+                self.plot_evaluation(evaluation, ax1)
+
             ax2 = plt.subplot2grid(grid_shape, (1, 0), colspan=2, fig=self.fig)
             self.plot_file(learning_rate, 'learning_rate', axis=ax2, ylabel='learning rate')
 
@@ -85,6 +89,11 @@ class Dashboard:
         axis.set_xlim(xlim)
         axis.set_ylim(ylim)
 
+    def plot_evaluation(self, df, axis):
+        axis.fill_between(df['episode'], df['min'], df['max'], color='C2', alpha=0.2)
+        axis.plot(df['episode'], df['mean'], 'o-', color='C2', label='greedy evaluation (mean, min-max)')
+        axis.legend()
+
     def plot_qtable(self, q_table, axis):
         df = pd.read_csv(StringIO(q_table.to_csv()))
         
@@ -1,55 +1,97 @@
 import argparse
-from io import StringIO
-from math import log
-import os
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 
-from agent import CartPoleAgent
+from utils.checkpoint import load_checkpoint
+from utils.projection import OBSERVATION_NAMES, project, project_argmax
 
-parser = argparse.ArgumentParser(description='Load and watch a previously trained model.')
+parser = argparse.ArgumentParser(description='Inspect the Q-table of a previously trained model.')
 parser.add_argument('path', type=str, default='', help='the path of the model that is to be loaded.')
+parser.add_argument('--dims', type=int, nargs='+', default=[2, 3],
+    help='the dimensions of the observation to project the Q-table onto (one or two of 0: cart position, \
+1: cart velocity, 2: pole angle, 3: pole velocity).')
+parser.add_argument('--value', type=str, default='q', choices=['q', 'action', 'visits'],
+    help='what to show: the best Q-value, the greedy action or the number of visits.')
+parser.add_argument('--reduce', type=str, default='max', choices=['max', 'mean'],
+    help='how the Q-values of the dimensions that are projected out are combined.')
+parser.add_argument('--page', type=int, default=0, help='the page of Q-table rows to print.')
+parser.add_argument('--page-size', type=int, default=20, help='the number of Q-table rows per page. Set to 0 to print no rows.')
+parser.add_argument('--no-plot', action='store_true', help='flag to indicate the projection should not be plotted.')
 args = parser.parse_args()
 
-
-def plot_qtable(agent):
-        df = pd.read_csv(StringIO(agent.q_table.to_csv()))
-
-        plt.figure(figsize=(8, 6))
-
-        ax1 = plt.subplot(121)
-        ax1.axis('tight')
-        ax1.axis('off')
-
-        text = []
-
-        n_rows, n_cols = df.values.shape
-
-        for row in range(n_rows):
-            text.append([])
-
-            for col in range(n_cols):
-                text[row].append('{:02.4f}'.format(df.values[row, col]).rstrip('0').rstrip('.'))
-
-        ax1.table(cellText=text, colLabels=df.columns, loc='center')
-        
-        ax2 = plt.subplot(122)
-        img = ax2.imshow(df.drop('observation', axis=1), cmap='hot_r')
-        plt.colorbar(img, ax=ax2)
-
-        step = int(log(len(df)))
-        ticks = [i for i in range(0, len(df), step)]
-        ax2.set_yticks(ticks)
-        ax2.set_yticklabels(df['observation'][df.index % step == 0])
-
-        ax2.set_ylabel('Bucketed Observation')
-        ax2.set_xlabel('Aciton')
-        ax2.set_title('Heatmap of values in Q-Table')
-
-        plt.tight_layout()
-        plt.show()
-
-agent = CartPoleAgent.load(args.path)
-plot_qtable(agent)
\ No newline at end of file
+def print_page(keys, values, page, page_size):
+    """Print a page of rows of the Q-table.
+
+    Arguments:
+        keys: the bucketed observations of the Q-table, sorted.
+        values: the Q-values of the Q-table, in the same order as keys.
+        page: the index of the page to print.
+        page_size: the number of rows in a page.
+    """
+    n_pages = max((len(keys) + page_size - 1) // page_size, 1)
+    start = page * page_size
+
+    print('Page {} of {} ({} rows)'.format(page, n_pages - 1, len(keys)))
+    print('observation, ' + ', '.join('action_{}'.format(action) for action in range(values.shape[1])))
+
+    for key, row in zip(keys[start:start + page_size], values[start:start + page_size]):
+        print('{}, {}'.format(''.join(map(str, key)), ', '.join('{:.4f}'.format(value) for value in row)))
+
+def plot_projection(projection, dims, title):
+    """Plot a 1-D or 2-D projection of the Q-table.
+
+    Arguments:
+        projection: the projected Q-table.
+        dims: the dimensions of the observation the Q-table was projected onto.
+        title: the title of the plot.
+    """
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 6))
+
+    if len(dims) == 1:
+        plt.bar(np.arange(len(projection)), projection)
+        plt.xlabel(OBSERVATION_NAMES[dims[0]])
+    else:
+        img = plt.imshow(projection, cmap='hot_r', origin='lower')
+        plt.colorbar(img)
+        plt.ylabel(OBSERVATION_NAMES[dims[0]])
+        plt.xlabel(OBSERVATION_NAMES[dims[1]])
+
+    plt.title(title)
+    plt.tight_layout()
+    plt.show()
+
+if not 1 <= len(args.dims) <= 2:
+    parser.error('--dims expects one or two dimensions.')
+
+agent = load_checkpoint(args.path)
+n_buckets = agent.bucketer.n_buckets
+active_dims = agent.active_dims.tolist()
+
+for dim in args.dims:
+    if dim not in active_dims:
+        parser.error('{} ({}) is ignored by the model\'s input mask.'.format(dim, OBSERVATION_NAMES[dim]))
+
+# The keys of the Q-table only have the values that are not masked.
+key_dims = [active_dims.index(dim) for dim in args.dims]
+keys, values = agent.q_table.to_arrays()
+
+print('Visited states: {} ({:.2%} coverage)'.format(len(agent.visitation), agent.visitation.coverage()))
+
+if args.page_size > 0:
+    print_page(keys, values, args.page, args.page_size)
+
+if not args.no_plot and len(keys) > 0:
+    if args.value == 'q':
+        projection = project(keys, values.max(axis=1), key_dims, n_buckets, reduce=args.reduce)
+        title = '{} Q-value'.format(args.reduce.capitalize())
+    elif args.value == 'action':
+        projection = project_argmax(keys, values, key_dims, n_buckets)
+        title = 'Greedy action'
+    else:
+        count_keys, counts = agent.action_counts.to_arrays()
+        projection = project(count_keys, counts.sum(axis=1), key_dims, n_buckets, reduce='sum')
+        title = 'Number of visits'
+
+    plot_projection(projection, args.dims, title)